@@ -2,13 +2,38 @@
 """
 Generate a Data Flow Diagram (DFD) for Airbnb Clone Backend
 Shows how data moves through the system
+
+Pass --traffic-log with one or more JSONL/CSV request logs to weight each
+flow by real volume (line width) and p95 latency (color); --themes renders
+extra color variants from the same layout; --low-memory renders the PNG in
+bands under a --max-rss-mb cap; --lint reports overlapping or out-of-bounds
+shapes and labels as JSON lines instead of rendering
 """
 
+import argparse
+import os
+import sys
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch, Circle, Rectangle
 import matplotlib.patches as mpatches
+from matplotlib.colors import LogNorm
+
+from traffic_weights import aggregate_logs, flow_key, is_mapped
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from diagram_tools import add_render_arguments, render_themes, tag_legend
+from diagram_tools.lint import lint_figure
+
+parser = argparse.ArgumentParser(description='Generate the Level 0 Data Flow Diagram')
+parser.add_argument('--traffic-log', nargs='+', metavar='LOG',
+                    help='JSONL/CSV request logs used to weight the flows')
+add_render_arguments(parser)
+args = parser.parse_args()
+
+# Per-flow {'count', 'p95_ms'} aggregated from the logs, keyed by flow label
+traffic = aggregate_logs(args.traffic_log).summary() if args.traffic_log else {}
 
 fig, ax = plt.subplots(1, 1, figsize=(22, 16))
 ax.set_xlim(0, 22)
@@ -20,6 +45,13 @@ color_external = '#FFE5B4'  # Peach for external entities
 color_process = '#E8F4F8'  # Light blue for processes
 color_store = '#F0E68C'    # Khaki for data stores
 color_flow = '#333333'     # Dark gray for flows
+color_idle = '#BBBBBB'     # Light gray for flows with no logged traffic
+
+# Traffic scales: width by request count, color by p95 latency
+max_count = max((t['count'] for t in traffic.values()), default=0)
+timed = [t['p95_ms'] for t in traffic.values() if t['p95_ms'] is not None]
+latency_cmap = plt.get_cmap('RdYlGn_r')
+latency_norm = LogNorm(vmin=max(min(timed), 0.1), vmax=max(max(timed), min(timed) * 10)) if timed else None
 
 # Helper to draw external entity (rectangle)
 def draw_external(x, y, label, w=2.5, h=1.2):
@@ -27,10 +59,10 @@ def draw_external(x, y, label, w=2.5, h=1.2):
                         boxstyle="round,pad=0.15",
                         facecolor=color_external,
                         edgecolor='black',
-                        linewidth=2)
+                        linewidth=2, gid='external')
     ax.add_patch(box)
     ax.text(x, y, label, ha='center', va='center', 
-           fontsize=10, fontweight='bold')
+           fontsize=10, fontweight='bold', gid='label')
 
 # Helper to draw process (rounded rectangle)
 def draw_process(x, y, label, w=2.8, h=1.5):
@@ -38,13 +70,13 @@ def draw_process(x, y, label, w=2.8, h=1.5):
                         boxstyle="round,pad=0.2",
                         facecolor=color_process,
                         edgecolor='#2c5aa0',
-                        linewidth=2)
+                        linewidth=2, gid='process')
     ax.add_patch(box)
     # Split label into lines if needed
     lines = label.split('\n')
     for i, line in enumerate(lines):
         ax.text(x, y + (len(lines)-1-i-0.5*(len(lines)-1)) * 0.15, line,
-               ha='center', va='center', fontsize=9, fontweight='bold')
+               ha='center', va='center', fontsize=9, fontweight='bold', gid='label')
 
 # Helper to draw data store (open rectangle on side)
 def draw_store(x, y, label, w=2.2, h=1.2):
@@ -62,10 +94,10 @@ def draw_store(x, y, label, w=2.2, h=1.2):
     ]
     from matplotlib.patches import Polygon
     poly = Polygon(points, closed=True, facecolor=color_store,
-                  edgecolor='black', linewidth=2)
+                  edgecolor='black', linewidth=2, gid='store')
     ax.add_patch(poly)
     ax.text(x, y, label, ha='center', va='center', 
-           fontsize=9, fontweight='bold')
+           fontsize=9, fontweight='bold', gid='label')
 
 # Helper to draw data flow arrow
 def draw_flow(x1, y1, x2, y2, label='', offset=0.2):
@@ -73,10 +105,24 @@ def draw_flow(x1, y1, x2, y2, label='', offset=0.2):
     mid_x = (x1 + x2) / 2
     mid_y = (y1 + y2) / 2
     
+    # Traffic-weighted flows keep their colors in every theme
+    color, linewidth, linestyle, role = color_flow, 1.8, '-', 'flow'
+    if traffic:
+        role = None
+        stats = traffic.get(flow_key(label))
+        if not stats or not stats['count']:
+            color, linewidth = color_idle, 0.8
+            if not is_mapped(flow_key(label)):
+                linestyle = '--'
+        else:
+            linewidth = 0.8 + 5.2 * (stats['count'] / max_count) ** 0.5
+            if latency_norm is not None and stats['p95_ms'] is not None:
+                color = latency_cmap(latency_norm(stats['p95_ms']))
+
     arrow = FancyArrowPatch((x1, y1), (x2, y2),
                            arrowstyle='->', mutation_scale=25,
-                           color=color_flow, linewidth=1.8,
-                           connectionstyle="arc3,rad=0.1")
+                           color=color, linewidth=linewidth, linestyle=linestyle,
+                           connectionstyle="arc3,rad=0.1", gid=role)
     ax.add_patch(arrow)
     
     if label:
@@ -86,7 +132,7 @@ def draw_flow(x1, y1, x2, y2, label='', offset=0.2):
         ax.text(label_x, label_y, label, ha='center', va='center',
                fontsize=8, bbox=dict(boxstyle='round,pad=0.3', 
                                     facecolor='white', alpha=0.9,
-                                    edgecolor='none'))
+                                    edgecolor='none'), gid='flow-label')
 
 # ===== EXTERNAL ENTITIES =====
 draw_external(2, 14, 'Guest')
@@ -214,7 +260,7 @@ draw_flow(8.4, 8.5, 9.15, 8.5, 'Payment\nStatus')
 
 # Title
 ax.text(11, 15.5, 'Airbnb Clone Backend - Data Flow Diagram (Level 0)', 
-        ha='center', va='top', fontsize=20, fontweight='bold')
+        ha='center', va='top', fontsize=20, fontweight='bold', gid='title')
 
 # Legend
 legend_elements = [
@@ -226,17 +272,33 @@ legend_elements = [
                   label='Data Store', linewidth=2),
 ]
 
-ax.legend(handles=legend_elements, loc='lower center', 
-         bbox_to_anchor=(0.5, 0.01), ncol=3, fontsize=11, 
-         framealpha=0.9, edgecolor='black')
+legend = ax.legend(handles=legend_elements, loc='lower center', 
+                   bbox_to_anchor=(0.5, 0.01), ncol=3, fontsize=11, 
+                   framealpha=0.9, edgecolor='black')
+tag_legend(legend, ['external', 'process', 'store'])
+
+# Traffic scale
+if latency_norm is not None:
+    sm = plt.cm.ScalarMappable(cmap=latency_cmap, norm=latency_norm)
+    cbar = fig.colorbar(sm, ax=ax, orientation='horizontal', fraction=0.02,
+                        pad=0.0, shrink=0.3, anchor=(0.95, 1.0))
+    cbar.set_label('Flow p95 latency (ms)', fontsize=10)
+
+if traffic:
+    ax.text(11, 14.95, f'Line width scales with logged request volume (max {max_count:,} requests); '
+            'gray flows had no logged traffic, dashed flows have no API route to count',
+            ha='center', va='center', fontsize=10, style='italic', color='gray', gid='footer')
 
 # Footer
 ax.text(11, 0.3, 'Data flows show movement of information through the system',
-        ha='center', va='bottom', fontsize=10, style='italic', color='gray')
+        ha='center', va='bottom', fontsize=10, style='italic', color='gray', gid='footer')
 
 plt.tight_layout()
-plt.savefig('data-flow-diagram/data-flow.png',
-            dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-print("Data Flow Diagram generated successfully: data-flow.png")
+if args.lint:
+    sys.exit(1 if lint_figure(fig) else 0)
+for path in render_themes(fig, 'data-flow-diagram/data-flow.png', args.themes,
+                          dpi=args.dpi, low_memory=args.low_memory,
+                          max_rss_mb=args.max_rss_mb):
+    print(f"Data Flow Diagram generated successfully: {os.path.basename(path)}")
 plt.close()
 
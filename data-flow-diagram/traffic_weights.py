@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Aggregate request logs into per-flow traffic for the Data Flow Diagram
+Streams JSONL/CSV logs (optionally gzipped) in fixed-size chunks and reduces
+them to a request count and p95 latency for every DFD flow label
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Routes from requirements.md mapped onto DFD flow labels (label newlines
+# replaced by spaces).  First match wins; a record may also name its flow
+# directly in a "flow" field, as long as it is one of FLOW_LABELS.
+FLOW_ROUTES = [
+    ('POST', r'/auth/verify-email$', 'Verification Status'),
+    ('POST', r'/auth/(register|login|refresh|logout|forgot-password|reset-password)$',
+     'Login Credentials'),
+    ('PUT|PATCH', r'/users/[^/]+$', 'Profile Updates'),
+    ('GET', r'/users/[^/]+$', 'Profile Data'),
+    ('GET', r'/properties/search$', 'Property Search Request'),
+    ('POST', r'/properties/[^/]+/images$', 'Property Images'),
+    ('PUT', r'/properties/[^/]+/availability$', 'Availability Updates'),
+    ('POST', r'/properties$', 'Property Data'),
+    ('PATCH|DELETE', r'/properties/[^/]+$', 'Property Data'),
+    ('GET', r'/properties/[^/]+$', 'Property Details'),
+    ('POST', r'/bookings/[^/]+/pay$', 'Payment Info'),
+    ('PATCH', r'/bookings/[^/]+/(cancel|status)$', 'Booking Modifications'),
+    ('POST', r'/bookings(/quote)?$', 'Booking Request'),
+    ('GET', r'/bookings(/[^/]+)?$', 'Booking History'),
+    ('POST', r'/payments/(webhook|callback)$', 'Payment Confirmation'),
+    ('POST', r'/reviews$', 'Review Data'),
+    ('POST', r'/messages$', 'Message'),
+    ('POST|PATCH|DELETE', r'/admin/', 'Moderation Actions'),
+]
+
+_COMPILED_ROUTES = [(frozenset(methods.split('|')), re.compile(pattern), flow)
+                    for methods, pattern, flow in FLOW_ROUTES]
+_ROUTED_FLOWS = frozenset(flow for _, _, flow in FLOW_ROUTES)
+
+# Internal flows between processes, stores and external services never show
+# up as API requests; they carry the traffic of the requests that cause them
+DERIVED_FLOWS = {
+    'User Data': ('Login Credentials', 'Verification Status'),
+    'User Info': ('Login Credentials',),
+    'User Auth': ('Profile Updates', 'Profile Data'),
+    'Property Updates': ('Availability Updates',),
+    'Property Listings': ('Property Search Request',),
+    'Image Files': ('Property Images',),
+    'Image URLs': ('Property Images', 'Property Details'),
+    'Booking Data': ('Booking Request',),
+    'Booking Status': ('Booking Modifications', 'Payment Confirmation'),
+    'Payment Required': ('Payment Info',),
+    'Payment Request': ('Payment Info',),
+    'Payment Records': ('Payment Info', 'Payment Confirmation'),
+    'Transaction Data': ('Payment Confirmation',),
+    'Payment Status': ('Payment Confirmation',),
+    'Ratings': ('Review Data',),
+    'Notification Data': ('Booking Request', 'Message'),
+}
+
+# Every flow label on the Level 0 DFD.  Flows that are neither routed nor
+# derived only get traffic from records that name them in a "flow" field.
+FLOW_LABELS = tuple(dict.fromkeys(
+    [flow for _, _, flow in FLOW_ROUTES] + list(DERIVED_FLOWS) + [
+        'Booking Responses', 'Booking Info', 'Booking Confirmation',
+        'Payment History', 'User Verification']))
+
+
+def is_mapped(flow):
+    """Whether a flow label gets traffic from routed requests."""
+    return flow in DERIVED_FLOWS or flow in _ROUTED_FLOWS
+
+# Latency histogram: log-spaced bins from 0.1 ms to 10 minutes, so p95 is
+# accurate to roughly 2% without keeping individual samples
+LATENCY_EDGES_MS = np.geomspace(0.1, 600_000, 768)
+
+PATH_FIELDS = ('path', 'route', 'url', 'uri')
+LATENCY_FIELDS = ('latency_ms', 'duration_ms', 'response_time_ms', 'elapsed_ms')
+
+
+@lru_cache(maxsize=65536)
+def match_flow(method, path):
+    """Return the DFD flow label for a request, or None if unmapped."""
+    method = method.upper()
+    path = path.split('?', 1)[0].rstrip('/')
+    for methods, pattern, flow in _COMPILED_ROUTES:
+        if method in methods and pattern.search(path):
+            return flow
+    return None
+
+
+def flow_key(label):
+    """Normalise a diagram label ('Booking\\nRequest') to its log key."""
+    return ' '.join(label.split())
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def iter_records(path):
+    """Yield log records one at a time from a JSONL or CSV file.
+
+    A line that is not a JSON object (truncated writes, stray output) yields
+    None so the caller can count it instead of aborting the whole run.
+    """
+    base = path[:-3] if path.endswith('.gz') else path
+    with _open(path) as handle:
+        if base.endswith('.csv'):
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    yield record if isinstance(record, dict) else None
+
+
+def _record_fields(record):
+    """Return (flow label or None, latency in ms or NaN) for one record.
+
+    Raises TypeError or ValueError for fields of the wrong type.
+    """
+    flow = record.get('flow')
+    if flow:
+        flow = flow_key(flow)
+    else:
+        path = next((record[f] for f in PATH_FIELDS if record.get(f)), None)
+        if path is None:
+            return None, np.nan
+        flow = match_flow(record.get('method') or 'GET', path)
+    latency = next((record[f] for f in LATENCY_FIELDS
+                    if record.get(f) not in (None, '')), None)
+    return flow, float(latency) if latency is not None else np.nan
+
+
+class TrafficAggregate:
+    """Running per-flow counts and latency histograms.
+
+    One row per label in FLOW_LABELS, allocated up front, so the size of the
+    aggregate does not depend on what the logs contain.
+    """
+
+    def __init__(self):
+        self.flows = {flow: i for i, flow in enumerate(FLOW_LABELS)}
+        self.counts = np.zeros(len(FLOW_LABELS), dtype=np.int64)
+        self.histograms = np.zeros((len(FLOW_LABELS), len(LATENCY_EDGES_MS) + 1),
+                                   dtype=np.int64)
+        self.unmatched = 0
+
+    def add_chunk(self, flow_indices, latencies):
+        """Fold one chunk of (flow index, latency in ms or NaN) into the totals."""
+        flow_indices = np.asarray(flow_indices, dtype=np.intp)
+        latencies = np.asarray(latencies, dtype=np.float64)
+        n_flows, n_bins = self.histograms.shape
+        self.counts += np.bincount(flow_indices, minlength=n_flows)
+
+        timed = ~np.isnan(latencies)
+        bins = np.searchsorted(LATENCY_EDGES_MS, latencies[timed])
+        self.histograms += np.bincount(flow_indices[timed] * n_bins + bins,
+                                       minlength=n_flows * n_bins).reshape(n_flows, n_bins)
+
+    def _with_derived(self):
+        """Counts and histograms with DERIVED_FLOWS adding up their feeders."""
+        counts = self.counts.copy()
+        histograms = self.histograms.copy()
+        for flow, feeders in DERIVED_FLOWS.items():
+            rows = [self.flows[f] for f in feeders]
+            counts[self.flows[flow]] += self.counts[rows].sum()
+            histograms[self.flows[flow]] += self.histograms[rows].sum(axis=0)
+        return counts, histograms
+
+    def percentile(self, q, histograms=None):
+        """Per-flow latency percentile in ms (upper bin edge), NaN if untimed."""
+        if histograms is None:
+            histograms = self.histograms
+        cumulative = np.cumsum(histograms, axis=1)
+        totals = cumulative[:, -1]
+        ranks = np.ceil(q / 100.0 * totals)
+        bins = (cumulative < ranks[:, None]).sum(axis=1)
+        edges = np.append(LATENCY_EDGES_MS, np.inf)
+        return np.where(totals > 0, edges[np.minimum(bins, len(edges) - 1)], np.nan)
+
+    def summary(self):
+        """Return {flow label: {'count': int, 'p95_ms': float or None}}.
+
+        Only flows with traffic are listed; derived flows include the
+        requests that feed them.
+        """
+        counts, histograms = self._with_derived()
+        p95 = self.percentile(95, histograms)
+        return {flow: {'count': int(counts[i]),
+                       'p95_ms': None if np.isnan(p95[i]) else float(p95[i])}
+                for flow, i in self.flows.items() if counts[i]}
+
+
+def aggregate_logs(paths, chunk_size=200_000):
+    """Stream every log in ``paths`` and return a TrafficAggregate.
+
+    Only one chunk of parsed flow indices and latencies is held at a time,
+    so memory is bounded by ``chunk_size`` rather than the size of the logs.
+    Malformed records, unknown ``flow`` values and unrouted requests are
+    skipped and counted in ``unmatched``.
+    """
+    totals = TrafficAggregate()
+    flow_indices = []
+    latencies = []
+
+    for path in paths:
+        for record in iter_records(path):
+            try:
+                flow, latency = _record_fields(record)
+                index = totals.flows[flow]
+            except (AttributeError, KeyError, TypeError, ValueError):
+                totals.unmatched += 1
+                continue
+            flow_indices.append(index)
+            latencies.append(latency)
+            if len(flow_indices) >= chunk_size:
+                totals.add_chunk(flow_indices, latencies)
+                flow_indices.clear()
+                latencies.clear()
+
+    if flow_indices:
+        totals.add_chunk(flow_indices, latencies)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='+', help='JSONL or CSV request logs (.gz ok)')
+    parser.add_argument('--chunk-size', type=int, default=200_000,
+                        help='records aggregated per NumPy batch')
+    parser.add_argument('--json', action='store_true',
+                        help='print the summary as JSON')
+    args = parser.parse_args()
+
+    totals = aggregate_logs(args.logs, chunk_size=args.chunk_size)
+    summary = totals.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    for flow, stats in sorted(summary.items(), key=lambda item: -item[1]['count']):
+        p95 = f"{stats['p95_ms']:>10.1f} ms" if stats['p95_ms'] is not None else 'untimed'
+        print(f"{flow:<28} {stats['count']:>12,}  p95 {p95}")
+    if totals.unmatched:
+        print(f"{'(unmatched)':<28} {totals.unmatched:>12,}")
+
+
+if __name__ == '__main__':
+    main()
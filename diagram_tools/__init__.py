@@ -0,0 +1,12 @@
+"""
+Shared helpers for the diagram generator scripts
+The command-line modules (lint, importer) are not imported here, so that
+`python -m diagram_tools.<module>` runs them cleanly
+"""
+
+from diagram_tools.banded import output_region, save_banded
+from diagram_tools.themes import (THEMES, add_render_arguments, apply_theme, parse_themes,
+                                  render_themes, tag_legend)
+
+__all__ = ['THEMES', 'add_render_arguments', 'apply_theme', 'output_region', 'parse_themes',
+           'render_themes', 'save_banded', 'tag_legend']
@@ -0,0 +1,246 @@
+"""
+Bounded-memory rendering of large figures
+Rasterizes a figure in horizontal bands and streams each band straight into
+a PNG encoder (or a memory-mapped .npy array), so the full-size RGBA buffer
+is never allocated
+"""
+
+import os
+import resource
+import struct
+import warnings
+import zlib
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+from matplotlib.text import Text
+from matplotlib.transforms import Bbox
+
+BYTES_PER_PIXEL = 4  # Agg renders RGBA
+MIN_BAND_ROWS = 16
+
+# Per-band memory: the Agg buffer, the filtered PNG rows, and headroom for
+# Agg scratch space and zlib output
+BAND_BUFFER_COPIES = 3
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is missing)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if peak > 2**32 else peak / 2**10
+
+
+def band_rows_for(width_px, max_rss_mb):
+    """Rows per band that keep peak RSS under ``max_rss_mb``."""
+    budget = (max_rss_mb - current_rss_mb()) * 2**20
+    rows = int(budget // (width_px * BYTES_PER_PIXEL * BAND_BUFFER_COPIES))
+    if rows < MIN_BAND_ROWS:
+        raise MemoryError(
+            f"max_rss_mb={max_rss_mb} leaves no room for a {width_px}px-wide band "
+            f"(process already uses {current_rss_mb():.0f} MB)")
+    return rows
+
+
+class StreamingPNGWriter:
+    """Write an RGBA PNG a block of rows at a time."""
+
+    def __init__(self, fileobj, width, height, dpi=None, level=6):
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+
+        fileobj.write(b'\x89PNG\r\n\x1a\n')
+        # 8-bit RGBA, deflate, adaptive filtering, no interlace
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        if dpi:
+            ppm = int(round(dpi / 0.0254))
+            self._chunk(b'pHYs', struct.pack('>IIB', ppm, ppm, 1))
+        self._chunk(b'tEXt', b'Software\x00diagram_tools.banded')
+
+    def _chunk(self, kind, data):
+        self.fileobj.write(struct.pack('>I', len(data)))
+        self.fileobj.write(kind)
+        self.fileobj.write(data)
+        self.fileobj.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, rgba):
+        """Append ``rgba`` (rows x width x 4, uint8) using the PNG Sub filter."""
+        rows = rgba.reshape(rgba.shape[0], -1)
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 1  # Sub: each byte minus the same channel one pixel left
+        filtered[:, 1:BYTES_PER_PIXEL + 1] = rows[:, :BYTES_PER_PIXEL]
+        np.subtract(rows[:, BYTES_PER_PIXEL:], rows[:, :-BYTES_PER_PIXEL],
+                    out=filtered[:, BYTES_PER_PIXEL + 1:])
+        data = self._compressor.compress(memoryview(filtered))
+        if data:
+            self._chunk(b'IDAT', data)
+        self.rows_written += rows.shape[0]
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"wrote {self.rows_written} of {self.height} rows")
+        self._chunk(b'IDAT', self._compressor.flush())
+        self._chunk(b'IEND', b'')
+
+
+def output_region(fig, dpi, bbox_inches='tight', pad_inches=0.1):
+    """Region of the figure to render, in inches, as savefig would crop it."""
+    width, height = fig.get_size_inches()
+    if bbox_inches is None:
+        return Bbox.from_bounds(0, 0, width, height)
+    if bbox_inches != 'tight':
+        return Bbox(bbox_inches)
+
+    # Text extents depend on dpi, so measure at the output dpi, but with a
+    # 1x1 pixel renderer instead of the full-size buffer savefig would use
+    original_dpi = fig.dpi
+    fig.set_dpi(dpi)
+    try:
+        tight = fig.get_tightbbox(RendererAgg(1, 1, dpi))
+    finally:
+        fig.set_dpi(original_dpi)
+    return tight.padded(pad_inches)
+
+
+def _wrapped_text(text, renderer):
+    """``text``'s string with the line breaks wrap=True gives it at the
+    current figure size, or None where matplotlib has no such hook.
+
+    matplotlib wraps text only while drawing it, through the private
+    ``Text._get_wrapped_text``, which measures with ``Text._renderer``;
+    tests/test_banded.py checks both against the installed matplotlib.
+    """
+    wrap = getattr(text, '_get_wrapped_text', None)
+    if wrap is None or not hasattr(text, '_renderer'):
+        return None
+    text._renderer = renderer
+    return wrap()
+
+
+def save_banded(fig, path, dpi=300, max_rss_mb=256, facecolor='white',
+                bbox_inches='tight', pad_inches=0.1, band_rows=None):
+    """Render ``fig`` to ``path`` one horizontal band at a time.
+
+    Works like ``fig.savefig(path, dpi=dpi, bbox_inches=bbox_inches,
+    facecolor=facecolor)`` but never holds more than one band of pixels,
+    sized so the process stays under ``max_rss_mb``.  ``path`` ending in
+    ``.npy`` writes a memory-mapped height x width x 4 uint8 array instead
+    of a PNG.  ``band_rows`` fixes the band height instead of deriving it
+    from ``max_rss_mb``.  Returns the number of bands rendered.
+    """
+    region = output_region(fig, dpi, bbox_inches, pad_inches)
+    # Truncated like the Agg canvas, which rounds up sizes within 1e-8 px
+    width_px = int(region.width * dpi + 1e-8)
+    height_px = int(region.height * dpi + 1e-8)
+    if band_rows is None:
+        band_rows = band_rows_for(width_px, max_rss_mb)
+
+    # Everything that banding changes, restored afterwards
+    original_size = fig.get_size_inches().copy()
+    original_dpi = fig.dpi
+    original_facecolor = fig.get_facecolor()
+    original_engine = fig.get_layout_engine()
+    original_canvas = fig.canvas
+    # wrap=True breaks lines to fit the figure, which shrinks to one band
+    # below, so wrapped text is broken at full size and drawn unwrapped
+    wrapped = [(text, text.get_text()) for text in fig.findobj(Text) if text.get_wrap()]
+    axes_state = []
+    for ax in fig.axes:
+        ax.apply_aspect()
+        axes_state.append((ax, ax.get_position(original=True),
+                           ax.get_position(original=False), ax.get_aspect(),
+                           ax.get_box_aspect()))
+
+    fig_width, fig_height = original_size
+    # Axes positions in inches, measured from the region's bottom-left corner
+    placements = [
+        (ax, (active.x0 * fig_width - region.x0, active.y0 * fig_height - region.y0,
+              active.width * fig_width, active.height * fig_height))
+        for ax, _original, active, _aspect, _box_aspect in axes_state
+    ]
+
+    if str(path).endswith('.npy'):
+        output = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                           shape=(height_px, width_px, BYTES_PER_PIXEL))
+        handle = writer = None
+    else:
+        output = None
+        handle = open(path, 'wb')
+        writer = StreamingPNGWriter(handle, width_px, height_px, dpi=dpi)
+
+    bands = 0
+    try:
+        fig.set_layout_engine('none')
+        fig.set_facecolor(facecolor)
+        fig.set_dpi(dpi)
+        measure = RendererAgg(1, 1, dpi)
+        for text, _original in wrapped:
+            broken = _wrapped_text(text, measure)
+            if broken is None:
+                warnings.warn('matplotlib no longer exposes text wrapping; wrapped labels '
+                              'are wrapped to each band instead of the full figure',
+                              RuntimeWarning)
+                break
+            text.set_text(broken)
+            text.set_wrap(False)
+        canvas = FigureCanvasAgg(fig)
+
+        for top in range(0, height_px, band_rows):
+            rows = min(band_rows, height_px - top)
+            band_height = rows / dpi
+            # Inches (from the region's bottom) where this band starts
+            band_bottom = (height_px - top - rows) / dpi
+            fig.set_size_inches(width_px / dpi, band_height, forward=False)
+            for ax, (x, y, w, h) in placements:
+                # Aspect constraints were applied above; re-applying them to
+                # a band-shaped figure would move the axes
+                ax.set_aspect('auto')
+                ax.set_box_aspect(None)
+                ax.set_position([x / (width_px / dpi), (y - band_bottom) / band_height,
+                                 w / (width_px / dpi), h / band_height])
+
+            canvas.draw()
+            band = np.asarray(canvas.buffer_rgba())[:rows, :width_px]
+            if band.shape[:2] != (rows, width_px):
+                # Float rounding in the canvas size can drop the last pixel
+                band = np.pad(band, ((0, rows - band.shape[0]),
+                                     (0, width_px - band.shape[1]), (0, 0)), mode='edge')
+            if output is not None:
+                output[top:top + rows] = band
+            else:
+                writer.write_rows(band)
+            del band
+            bands += 1
+
+        if output is not None:
+            output.flush()
+        else:
+            writer.close()
+    finally:
+        if handle is not None:
+            handle.close()
+        del output
+        fig.set_size_inches(original_size, forward=False)
+        fig.set_dpi(original_dpi)
+        fig.set_facecolor(original_facecolor)
+        for text, original in wrapped:
+            text.set_text(original)
+            text.set_wrap(True)
+        if original_engine is not None:
+            fig.set_layout_engine(original_engine)
+        for ax, original, active, aspect, box_aspect in axes_state:
+            ax.set_aspect(aspect)
+            ax.set_box_aspect(box_aspect)
+            ax.set_position(original, which='original')
+            ax.set_position(active, which='active')
+        fig.set_canvas(original_canvas)
+
+    return bands
@@ -0,0 +1,792 @@
+"""
+Import Graphviz DOT and Mermaid flowcharts into the diagram renderer
+Both formats are read by streaming tokenizers that turn the text into node
+and edge events one statement at a time.  Events go straight into a compact
+Graph (a node table plus int32 edge arrays), so no parse tree is built and
+memory grows with the number of nodes and edges, not with the file
+"""
+
+import argparse
+import os
+import re
+import sys
+import textwrap
+from array import array
+from itertools import chain
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import FancyArrowPatch, FancyBboxPatch, Polygon
+
+from diagram_tools.banded import BAND_BUFFER_COPIES, BYTES_PER_PIXEL, current_rss_mb
+from diagram_tools.lint import lint_figure
+from diagram_tools.themes import THEMES, add_render_arguments, render_themes
+
+# The shape vocabulary of the DFD and flowchart scripts
+KINDS = ('external', 'process', 'store', 'decision', 'terminal', 'data')
+DEFAULT_KIND = 'process'
+
+# Graphviz shapes that are not processes; every other shape (box, ellipse,
+# record, ...) maps to DEFAULT_KIND.  A node's own `kind` attribute wins.
+DOT_SHAPES = {
+    'square': 'external', 'house': 'external', 'invhouse': 'external',
+    'box3d': 'external', 'component': 'external',
+    'cylinder': 'store', 'folder': 'store', 'tab': 'store',
+    'diamond': 'decision', 'Mdiamond': 'decision',
+    'doublecircle': 'terminal', 'Mcircle': 'terminal', 'Msquare': 'terminal',
+    'point': 'terminal',
+    'parallelogram': 'data',
+}
+
+# Mermaid node brackets, longest opener first.  A `:::kind` class or a
+# `class A,B kind` line naming one of KINDS wins over the bracket shape.
+MERMAID_SHAPES = [
+    ('(((', ')))', 'terminal'),   # double circle
+    ('([', '])', 'terminal'),     # stadium
+    ('((', '))', 'terminal'),     # circle
+    ('[(', ')]', 'store'),        # cylinder
+    ('[[', ']]', 'external'),     # subroutine
+    ('[/', '/]', 'data'),         # parallelogram
+    ('[\\', '\\]', 'data'),
+    ('[/', '\\]', 'data'),        # trapezoid
+    ('[\\', '/]', 'data'),
+    ('{{', '}}', 'process'),      # hexagon
+    ('>', ']', 'external'),       # asymmetric
+    ('[', ']', 'process'),
+    ('(', ')', 'process'),
+    ('{', '}', 'decision'),
+]
+
+# Node size and spacing in data units, as in the flowchart script
+NODE_WIDTH, NODE_HEIGHT = 2.5, 0.8
+RANK_GAP = {'TB': 2.0, 'LR': NODE_WIDTH + 1.3}
+SLOT_GAP = {'TB': NODE_WIDTH + 0.9, 'LR': 1.5}
+
+# Graphs up to DETAIL_LIMIT nodes are drawn like the hand-made diagrams
+# (labelled patches and arrows); larger ones as one collection per kind
+DETAIL_LIMIT = 400
+INCHES_PER_UNIT = 0.9
+MAX_FIGURE_INCHES = 120
+
+
+class Graph:
+    """Nodes and edges of an imported graph in compact arrays."""
+
+    def __init__(self):
+        self.index = {}            # node name -> node index
+        self.kinds = array('b')    # index into KINDS
+        self.labels = []
+        self.sources = array('i')
+        self.targets = array('i')
+        self.directed = array('b')  # 1 for an edge drawn with an arrow head
+        self.edge_labels = {}      # edge index -> label, labelled edges only
+        self.attrs = {}            # graph attributes: name, label, rankdir
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def edge_count(self):
+        return len(self.sources)
+
+    @property
+    def direction(self):
+        rankdir = str(self.attrs.get('rankdir', 'TB')).upper()
+        return rankdir if rankdir in ('TB', 'BT', 'LR', 'RL') else 'TB'
+
+    def add_node(self, name, kind=None, label=None, explicit=True):
+        """Add ``name`` or, for an explicit declaration, update it; return its index.
+
+        An implicit declaration (a node first seen as an edge endpoint) only
+        takes effect when the node is new.
+        """
+        index = self.index.get(name)
+        if index is None:
+            index = self.index[name] = len(self.kinds)
+            self.kinds.append(KINDS.index(kind or DEFAULT_KIND))
+            self.labels.append(name if label is None else label)
+        elif explicit:
+            if kind is not None:
+                self.kinds[index] = KINDS.index(kind)
+            if label is not None:
+                self.labels[index] = label
+        return index
+
+    def add_edge(self, tail, head, label=None, directed=True):
+        self.sources.append(self.add_node(tail, explicit=False))
+        self.targets.append(self.add_node(head, explicit=False))
+        self.directed.append(bool(directed))
+        if label:
+            self.edge_labels[len(self.sources) - 1] = label
+
+
+def build_graph(events):
+    """Fold ('node', ...), ('edge', ...) and ('graph', ...) events into a Graph."""
+    graph = Graph()
+    for event in events:
+        if event[0] == 'node':
+            graph.add_node(*event[1:])
+        elif event[0] == 'edge':
+            graph.add_edge(*event[1:])
+        else:
+            graph.attrs[event[1]] = event[2]
+    return graph
+
+
+# ===== DOT =====
+
+_DOT_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|\#[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<edgeop>->|--)
+  | (?P<id>[^\W\d]\w*|-?(?:\.\d+|\d+(?:\.\d*)?))
+  | (?P<punct>[{}\[\];,=:+])
+''', re.VERBOSE | re.DOTALL)
+
+_DOT_KEYWORDS = {'strict', 'graph', 'digraph', 'subgraph', 'node', 'edge'}
+
+
+_HTML_BRACKET = re.compile(r'[<>]')
+
+
+def _html_end(text, start, depth=0):
+    """Scan the <...> HTML string in ``text`` from ``start``, with ``depth``
+    brackets already open.  Returns (end, 0) once it closes, or (-1, depth)
+    so that a scan cut off at the end of ``text`` can resume from there."""
+    for bracket in _HTML_BRACKET.finditer(text, start):
+        depth += 1 if bracket.group() == '<' else -1
+        if depth == 0:
+            return bracket.end(), 0
+    return -1, depth
+
+
+def _html_text(html):
+    text = re.sub(r'<br\s*/?>', '\n', html, flags=re.IGNORECASE)
+    text = re.sub(r'<[^>]*>', '', text)
+    return '\n'.join(' '.join(line.split()) for line in text.splitlines()).strip()
+
+
+def tokenize_dot(chunks):
+    """Yield (type, value, line) tokens from an iterable of DOT text chunks.
+
+    Only the unconsumed tail of the current chunk is buffered: a token cut
+    off at a chunk boundary waits for the next chunk.  Types are 'id',
+    'string' (quoted or HTML, never a keyword), 'edgeop', 'punct' and a
+    final 'eof'.
+    """
+    buffer = ''
+    line = 1
+    # How far an HTML string cut off by the last chunk was scanned, and the
+    # brackets left open there, so a long label is not rescanned per chunk
+    html_scanned = html_depth = 0
+    for chunk in chain(chunks, [None]):
+        eof = chunk is None
+        if not eof:
+            buffer += chunk
+        pos, end = 0, len(buffer)
+        while pos < end:
+            if buffer[pos] == '<':
+                stop, depth = _html_end(buffer, pos + html_scanned, html_depth)
+                html_scanned = html_depth = 0
+                if stop < 0:
+                    if eof:
+                        raise ValueError(f"line {line}: unterminated HTML string")
+                    html_scanned, html_depth = end - pos, depth
+                    break
+                kind, value = 'string', _html_text(buffer[pos + 1:stop - 1])
+            else:
+                match = _DOT_TOKEN.match(buffer, pos)
+                if match is None:
+                    # An unterminated string or comment, half of an edge
+                    # operator or a numeral cut after its sign or point
+                    # (`-`, `.`, `-.`) may be completed by the next chunk
+                    if not eof and buffer[pos] in '"/-.':
+                        break
+                    raise ValueError(f"line {line}: unexpected {buffer[pos]!r}")
+                stop = match.end()
+                if stop == end and not eof:
+                    break
+                kind, value = match.lastgroup, match.group()
+                if kind == 'string':
+                    value = value[1:-1].replace('\\\n', '').replace('\\"', '"')
+            if kind not in ('space', 'comment'):
+                yield kind, value, line
+            line += buffer.count('\n', pos, stop)
+            pos = stop
+        buffer = buffer[pos:]
+    yield 'eof', None, line
+
+
+class _Lookahead:
+    """Token iterator with one token of lookahead."""
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._peeked = None
+
+    def peek(self):
+        if self._peeked is None:
+            self._peeked = next(self._tokens)
+        return self._peeked
+
+    def next(self):
+        token = self.peek()
+        self._peeked = None
+        return token
+
+    def accept(self, value):
+        """Consume the next token if it is the punctuation ``value``."""
+        kind, text, _ = self.peek()
+        if kind in ('punct', 'edgeop') and text == value:
+            return self.next()
+        return None
+
+    def expect(self, value):
+        token = self.accept(value)
+        if token is None:
+            kind, text, line = self.peek()
+            raise ValueError(f"line {line}: expected {value!r}, found {text!r}")
+        return token
+
+
+def _keyword(token):
+    kind, value, _ = token
+    if kind == 'id' and value.lower() in _DOT_KEYWORDS:
+        return value.lower()
+    return None
+
+
+def _dot_id(tokens, token):
+    """Value of an ID token, joining "a" + "b" string concatenation."""
+    kind, value, line = token
+    if kind not in ('id', 'string') or _keyword(token):
+        raise ValueError(f"line {line}: expected an identifier, found {value!r}")
+    while kind == 'string' and tokens.accept('+'):
+        kind, more, line = tokens.next()
+        if kind != 'string':
+            raise ValueError(f"line {line}: expected a string after '+'")
+        value += more
+    return value
+
+
+def _dot_attr_list(tokens):
+    """Parse any number of [key=value, ...] groups into one dict."""
+    attrs = {}
+    while tokens.accept('['):
+        while not tokens.accept(']'):
+            key = _dot_id(tokens, tokens.next())
+            attrs[key] = _dot_id(tokens, tokens.next()) if tokens.accept('=') else 'true'
+            tokens.accept(',') or tokens.accept(';')
+    return attrs
+
+
+def _dot_label(label, name):
+    if label is None:
+        return None
+    label = label.replace('\\N', name).replace('\\G', '')
+    return re.sub(r'\\[nlr]', '\n', label).strip()
+
+
+def _dot_node(name, attrs, explicit):
+    kind = attrs.get('kind')
+    if kind not in KINDS:
+        kind = DOT_SHAPES.get(attrs['shape'], DEFAULT_KIND) if 'shape' in attrs else None
+    return 'node', name, kind, _dot_label(attrs.get('label'), name), explicit
+
+
+def _dot_operand(tokens, scope, token):
+    """Parse a node ID or subgraph; yield its events, return its node names.
+
+    A node ID declares the node with the current defaults, which only take
+    effect when the node is new.
+    """
+    if _keyword(token) == 'subgraph' or token[:2] == ('punct', '{'):
+        return (yield from _dot_subgraph(tokens, scope, token))
+    name = _dot_id(tokens, token)
+    # Ports (node:port:compass) only affect where edges attach
+    while tokens.accept(':'):
+        _dot_id(tokens, tokens.next())
+    yield _dot_node(name, scope['node'], False)
+    if scope['members'] is not None:
+        scope['members'].append(name)
+    return [name]
+
+
+def _dot_subgraph(tokens, scope, token):
+    if _keyword(token) == 'subgraph':
+        if tokens.peek()[0] in ('id', 'string') and not _keyword(tokens.peek()):
+            tokens.next()
+        tokens.expect('{')
+    # Defaults set inside a subgraph stay inside it
+    inner = {'node': scope['node'], 'edge': scope['edge'], 'members': []}
+    yield from _dot_statements(tokens, inner)
+    if scope['members'] is not None:
+        scope['members'].extend(inner['members'])
+    return inner['members']
+
+
+def _dot_statements(tokens, scope):
+    """Parse statements up to the '}' closing the current block, yielding events."""
+    root = scope['members'] is None
+    while True:
+        token = tokens.next()
+        kind, value, line = token
+        if kind == 'eof':
+            raise ValueError(f"line {line}: missing '}}'")
+        if kind == 'punct' and value == '}':
+            return
+        if kind == 'punct' and value in ';,':
+            continue
+
+        word = _keyword(token)
+        if word in ('graph', 'node', 'edge'):
+            attrs = _dot_attr_list(tokens)
+            if word != 'graph':
+                scope[word] = {**scope[word], **attrs}
+            elif root:
+                for key, item in attrs.items():
+                    yield 'graph', key, item
+            continue
+        if kind in ('id', 'string') and not word and tokens.peek()[:2] == ('punct', '='):
+            # ID = ID sets a graph attribute
+            tokens.next()
+            item = _dot_id(tokens, tokens.next())
+            if root:
+                yield 'graph', value, item
+            continue
+
+        tails = yield from _dot_operand(tokens, scope, token)
+        if tokens.peek()[0] != 'edgeop':
+            # A node statement: its own attributes also update a node seen before
+            attrs = _dot_attr_list(tokens)
+            if attrs and kind != 'punct' and word != 'subgraph':
+                yield _dot_node(tails[0], attrs, True)
+            continue
+
+        # An edge chain a -> b -> {c d}: pairs are buffered until the
+        # trailing attribute list, which applies to every edge of the chain
+        pairs = []
+        while tokens.peek()[0] == 'edgeop':
+            # `--` is the undirected edge of a `graph`
+            directed = tokens.next()[1] == '->'
+            heads = yield from _dot_operand(tokens, scope, tokens.next())
+            pairs.extend((tail, head, directed) for tail in tails for head in heads)
+            tails = heads
+        attrs = {**scope['edge'], **_dot_attr_list(tokens)}
+        label = attrs.get('label')
+        for tail, head, directed in pairs:
+            if 'dir' in attrs:
+                directed = attrs['dir'] != 'none'
+            yield 'edge', tail, head, _dot_label(label, ''), directed
+
+
+def dot_events(chunks):
+    """Yield graph, node and edge events from DOT text chunks."""
+    tokens = _Lookahead(tokenize_dot(chunks))
+    token = tokens.next()
+    if _keyword(token) == 'strict':
+        token = tokens.next()
+    if _keyword(token) not in ('graph', 'digraph'):
+        raise ValueError(f"line {token[2]}: expected 'graph' or 'digraph', found {token[1]!r}")
+    if tokens.peek()[0] in ('id', 'string'):
+        yield 'graph', 'name', _dot_id(tokens, tokens.next())
+    tokens.expect('{')
+    yield from _dot_statements(tokens, {'node': {}, 'edge': {}, 'members': None})
+
+
+# ===== Mermaid =====
+
+_MERMAID_ID = r'[\w$]+(?:[.-][\w$]+)*'
+_MERMAID_NODE = re.compile(
+    r'\s*(?P<id>' + _MERMAID_ID + r')(?:'
+    + '|'.join(rf'{re.escape(opener)}(?P<text{i}>"[^"]*"|.*?){re.escape(closer)}'
+               for i, (opener, closer, _) in enumerate(MERMAID_SHAPES))
+    + r')?(?::::(?P<cls>[\w-]+))?')
+# A link is directed when it ends in a tip: an arrow head, circle or cross
+_MERMAID_LINK = re.compile(r'''\s*(?:
+    (?P<open>--|==|-\.)\s+(?P<text>[^|]+?)\s*(?P<close>(?:-{2,}>|={2,}>|\.-+>|-{3,}|={3,}|\.-+)[ox]?)
+  | (?P<link>[<ox]?(?:-{2,}|={2,}|-\.+-|~{3,})[>ox]?)
+)(?:\s*\|(?P<pipe>[^|]*)\|)?''', re.VERBOSE)
+_MERMAID_CLASS = re.compile(r'class\s+(?P<ids>[^\s,]+(?:\s*,\s*[^\s,]+)*)\s+(?P<cls>[\w-]+)\s*$')
+_MERMAID_AMPERSAND = re.compile(r'\s*&')
+_MERMAID_IGNORED = {'classDef', 'style', 'linkStyle', 'click', 'direction',
+                    'subgraph', 'end', 'accTitle', 'accDescr'}
+_MERMAID_DIRECTIONS = {'TB': 'TB', 'TD': 'TB', 'BT': 'BT', 'LR': 'LR', 'RL': 'RL'}
+
+
+def _mermaid_text(text):
+    text = text.strip()
+    if len(text) > 1 and text[0] == text[-1] == '"':
+        text = text[1:-1]
+    return re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE).strip()
+
+
+def _mermaid_group(statement, pos, number):
+    """Parse `a & b[Label] & c`; return the node events and the end position."""
+    events = []
+    while True:
+        match = _MERMAID_NODE.match(statement, pos)
+        if match is None:
+            raise ValueError(f"line {number}: expected a node in {statement.strip()!r}")
+        kind = label = None
+        for i, (_, _, shape_kind) in enumerate(MERMAID_SHAPES):
+            if match.group(f'text{i}') is not None:
+                kind, label = shape_kind, _mermaid_text(match.group(f'text{i}'))
+                break
+        if match.group('cls') in KINDS:
+            kind = match.group('cls')
+        events.append(('node', match.group('id'), kind, label, kind is not None))
+        pos = match.end()
+        ampersand = _MERMAID_AMPERSAND.match(statement, pos)
+        if ampersand is None:
+            return events, pos
+        pos = ampersand.end()
+
+
+def _mermaid_statement(statement, number):
+    """Yield the node and edge events of one statement (`A --> B & C`)."""
+    tails, pos = _mermaid_group(statement, 0, number)
+    yield from tails
+    while statement[pos:].strip():
+        link = _MERMAID_LINK.match(statement, pos)
+        if link is None:
+            raise ValueError(f"line {number}: cannot parse {statement[pos:].strip()!r}")
+        label = link.group('text') or link.group('pipe')
+        directed = (link.group('close') or link.group('link'))[-1] in '>ox'
+        heads, pos = _mermaid_group(statement, link.end(), number)
+        yield from heads
+        for tail in tails:
+            for head in heads:
+                yield ('edge', tail[1], head[1], _mermaid_text(label) if label else None,
+                       directed)
+        tails = heads
+
+
+def mermaid_events(lines):
+    """Yield graph, node and edge events from the lines of a Mermaid flowchart.
+
+    `class A,B store` lines naming one of KINDS apply after the last line,
+    so they win over bracket shapes wherever the nodes are declared.
+    """
+    header = False
+    front_matter = False
+    classes = {}   # node name -> kind from class lines
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if number == 1 and line == '---':
+            front_matter = True
+            continue
+        if front_matter:
+            if line == '---':
+                front_matter = False
+            elif line.startswith('title:'):
+                yield 'graph', 'label', line[len('title:'):].strip().strip('"')
+            continue
+        if not line or line.startswith('%%'):
+            continue
+        if not header:
+            match = re.match(r'(flowchart|graph)\b\s*(\w*)', line)
+            if match is None:
+                raise ValueError(f"line {number}: only Mermaid flowcharts can be imported")
+            yield 'graph', 'rankdir', _MERMAID_DIRECTIONS.get(match.group(2).upper(), 'TB')
+            header = True
+            line = line[match.end():]
+        for statement in re.findall(r'(?:[^;"]|"[^"]*")+', line):
+            if not statement.strip() or statement.split()[0].rstrip(':') in _MERMAID_IGNORED:
+                continue
+            if statement.split()[0] == 'class':
+                match = _MERMAID_CLASS.match(statement.strip())
+                if match is None:
+                    raise ValueError(f"line {number}: cannot parse {statement.strip()!r}")
+                if match.group('cls') in KINDS:
+                    for name in re.split(r'\s*,\s*', match.group('ids')):
+                        classes[name] = match.group('cls')
+                continue
+            yield from _mermaid_statement(statement, number)
+    if not header:
+        raise ValueError("no Mermaid flowchart found")
+    for name, kind in classes.items():
+        yield 'node', name, kind, None, True
+
+
+# ===== Import =====
+
+def detect_format(path):
+    """'dot' or 'mermaid', from the extension or else the first statement."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.dot', '.gv'):
+        return 'dot'
+    if ext in ('.mmd', '.mermaid'):
+        return 'mermaid'
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            words = line.split()
+            if not words or line.lstrip().startswith(('%%', '//', '#', '---')):
+                continue
+            if words[0].lower() in ('strict', 'digraph') or '{' in line:
+                return 'dot'
+            return 'mermaid'
+    raise ValueError(f"{path}: empty graph file")
+
+
+def import_graph(path, fmt=None, chunk_size=1 << 16):
+    """Stream a DOT or Mermaid file into a Graph."""
+    fmt = fmt or detect_format(path)
+    with open(path, encoding='utf-8') as handle:
+        if fmt == 'dot':
+            events = dot_events(iter(lambda: handle.read(chunk_size), ''))
+        elif fmt == 'mermaid':
+            events = mermaid_events(handle)
+        else:
+            raise ValueError(f"unknown format {fmt!r}; choose from dot, mermaid")
+        return build_graph(events)
+
+
+# ===== Layout =====
+
+def _successors(indptr, heads, nodes):
+    """(tail, head) arrays of every edge leaving ``nodes`` (CSR adjacency)."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    run_start = np.repeat(np.cumsum(counts) - counts, counts)
+    offsets = np.arange(counts.sum()) - run_start
+    return np.repeat(nodes, counts), heads[np.repeat(starts, counts) + offsets]
+
+
+def _ranks(n, src, dst):
+    """Longest-path layering, one frontier at a time.
+
+    When only cycles are left, one unranked node is taken next, turning its
+    remaining in-edges into back edges: preferably a node already reached
+    from a ranked one, with the fewest unranked predecessors.
+    """
+    order = np.argsort(src, kind='stable')
+    heads = dst[order]
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    indegree = np.bincount(dst, minlength=n)
+    rank = np.zeros(n, dtype=np.intp)
+    done = np.zeros(n, dtype=bool)
+    reached = np.zeros(n, dtype=bool)
+    frontier = np.flatnonzero(indegree == 0)
+    remaining = n
+    while remaining:
+        if not len(frontier):
+            left = np.flatnonzero(~done & reached)
+            if not len(left):
+                left = np.flatnonzero(~done)
+            frontier = left[[np.argmin(indegree[left])]]
+        done[frontier] = True
+        remaining -= len(frontier)
+        tails, nexts = _successors(indptr, heads, frontier)
+        pending = ~done[nexts]
+        tails, nexts = tails[pending], nexts[pending]
+        np.maximum.at(rank, nexts, rank[tails] + 1)
+        np.subtract.at(indegree, nexts, 1)
+        reached[nexts] = True
+        candidates = np.unique(nexts)
+        frontier = candidates[indegree[candidates] == 0]
+    return rank
+
+
+def _slots(rank, key):
+    """Centered position of every node within its rank, ordered by ``key``."""
+    order = np.lexsort((key, rank))
+    ranked = rank[order]
+    slot = np.empty(len(rank))
+    slot[order] = np.arange(len(rank)) - np.searchsorted(ranked, ranked, side='left')
+    return slot - (np.bincount(rank)[rank] - 1) / 2
+
+
+def layout(graph, iterations=4):
+    """Layered layout of ``graph``: an (n, 2) array of node centers.
+
+    Nodes are ranked by longest path along the edges, then each rank is
+    reordered a few times by the mean position of the node's neighbours
+    (barycenter heuristic) to shorten edges.  Every step is a NumPy pass
+    over the edge arrays.
+    """
+    n = len(graph)
+    if not n:
+        return np.zeros((0, 2))
+    src = np.frombuffer(graph.sources, dtype=np.int32).astype(np.intp)
+    dst = np.frombuffer(graph.targets, dtype=np.int32).astype(np.intp)
+    loops = src == dst
+    src, dst = src[~loops], dst[~loops]
+
+    rank = _ranks(n, src, dst)
+    across = _slots(rank, np.arange(n))
+    degree = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+    for _ in range(iterations):
+        total = (np.bincount(src, weights=across[dst], minlength=n) +
+                 np.bincount(dst, weights=across[src], minlength=n))
+        barycenter = np.where(degree > 0, total / np.maximum(degree, 1), across)
+        across = _slots(rank, barycenter)
+
+    direction = graph.direction
+    flow = 'LR' if direction in ('LR', 'RL') else 'TB'
+    along = rank * RANK_GAP[flow] * (1 if direction in ('BT', 'LR') else -1)
+    across = across * SLOT_GAP[flow]
+    if flow == 'LR':
+        return np.column_stack([along, -across])
+    return np.column_stack([across, along])
+
+
+# ===== Rendering =====
+
+def _outline(kind, x=0.0, y=0.0):
+    """Polygon of a node shape centered on (x, y), used for large graphs."""
+    w, h = NODE_WIDTH / 2, NODE_HEIGHT / 2
+    if kind == 'decision':
+        points = [(0, -NODE_HEIGHT), (w * 0.6, 0), (0, NODE_HEIGHT), (-w * 0.6, 0)]
+    elif kind == 'data':
+        points = [(-w + 0.2, -h), (w, -h), (w - 0.2, h), (-w, h)]
+    elif kind == 'store':
+        points = [(-w, -h), (w, -h), (w, h), (-w, h), (-w, h / 2), (-w + 0.2, h / 2),
+                  (-w + 0.2, -h / 2), (-w, -h / 2)]
+    elif kind == 'terminal':
+        arc = np.linspace(-np.pi / 2, np.pi / 2, 7)
+        right = np.column_stack([w - h + h * np.cos(arc), h * np.sin(arc)])
+        points = np.vstack([right, -right])
+    else:
+        points = [(-w, -h), (w, -h), (w, h), (-w, h)]
+    return np.asarray(points, dtype=np.float64) + (x, y)
+
+
+# Helper to draw one node in the style of the hand-made diagrams
+def _draw_node(ax, kind, x, y, label):
+    style = dict(THEMES['light'][kind], linewidth=2, gid=kind)
+    w, h = NODE_WIDTH, NODE_HEIGHT
+    if kind in ('decision', 'data', 'store'):
+        patch = Polygon(_outline(kind, x, y), closed=True, **style)
+    else:
+        pad = {'external': 0.15, 'process': 0.1, 'terminal': 0.15}[kind]
+        patch = FancyBboxPatch((x - w / 2, y - h / 2), w, h,
+                               boxstyle=f"round,pad={pad}", **style)
+    ax.add_patch(patch)
+    if '\n' not in label:
+        label = textwrap.fill(label, 18 if kind != 'decision' else 12)
+    ax.text(x, y, label, ha='center', va='center',
+            fontsize=8 if kind in ('decision', 'data') else 9, fontweight='bold', gid='label')
+    return patch
+
+
+def _draw_detailed(ax, graph, positions):
+    patches = [_draw_node(ax, KINDS[kind], x, y, label)
+               for kind, (x, y), label in zip(graph.kinds, positions.tolist(), graph.labels)]
+    along = 0 if graph.direction in ('LR', 'RL') else 1
+    sign = 1 if graph.direction in ('BT', 'LR') else -1
+    for index, (tail, head) in enumerate(zip(graph.sources, graph.targets)):
+        if tail == head:
+            continue  # self-loops are not drawn
+        start, end = positions[tail], positions[head]
+        # Edges that do not point down the ranks curve around the nodes between;
+        # both ends are clipped to the node outlines
+        forward = (end[along] - start[along]) * sign > 0
+        rad = 0 if forward else 0.3
+        arrow = FancyArrowPatch(tuple(start), tuple(end), patchA=patches[tail],
+                                patchB=patches[head], mutation_scale=20,
+                                arrowstyle='->' if graph.directed[index] else '-',
+                                connectionstyle=f'arc3,rad={rad}',
+                                shrinkA=0, shrinkB=0, linewidth=1.8, gid='flow',
+                                **THEMES['light']['flow'])
+        ax.add_patch(arrow)
+        label = graph.edge_labels.get(index)
+        if label:
+            # Midpoint of the arc3 curve: half-way to its control point
+            (dx, dy), (mid_x, mid_y) = end - start, (start + end) / 2
+            mid_x, mid_y = mid_x + rad * dy / 2, mid_y - rad * dx / 2
+            ax.text(mid_x, mid_y, label, ha='center', va='center', fontsize=7, style='italic',
+                    bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.9,
+                              edgecolor='none'), gid='flow-label')
+
+
+def _draw_overview(ax, graph, positions):
+    src = np.frombuffer(graph.sources, dtype=np.int32)
+    dst = np.frombuffer(graph.targets, dtype=np.int32)
+    segments = np.stack([positions[src], positions[dst]], axis=1)
+    ax.add_collection(LineCollection(segments, linewidths=0.4, gid='flow',
+                                     colors=THEMES['light']['flow']['color']))
+    kinds = np.frombuffer(graph.kinds, dtype=np.int8)
+    for code, kind in enumerate(KINDS):
+        centers = positions[kinds == code]
+        if not len(centers):
+            continue
+        verts = _outline(kind)[None, :, :] + centers[:, None, :]
+        style = THEMES['light'][kind]
+        ax.add_collection(PolyCollection(verts, linewidths=0.6, gid=kind,
+                                         facecolors=style['facecolor'],
+                                         edgecolors=style['edgecolor']))
+
+
+def draw_graph(graph, positions=None, title=None):
+    """Draw ``graph`` on a new Figure sized to its layout and return the figure.
+
+    Artists carry the same roles (gids) as the hand-made diagrams, so
+    themes and the geometry linter apply unchanged.
+    """
+    if positions is None:
+        positions = layout(graph)
+    if title is None:
+        title = graph.attrs.get('label') or graph.attrs.get('name')
+    title = _dot_label(title, '') if title else None
+
+    if len(positions):
+        low = positions.min(axis=0) - (NODE_WIDTH / 2 + 0.5, NODE_HEIGHT + 0.5)
+        high = positions.max(axis=0) + (NODE_WIDTH / 2 + 0.5, NODE_HEIGHT + 0.5)
+    else:
+        low, high = np.zeros(2), np.array([NODE_WIDTH, NODE_HEIGHT])
+    if title:
+        high = high + (0, 1.2)
+    width, height = high - low
+    scale = min(INCHES_PER_UNIT, MAX_FIGURE_INCHES / max(width, height))
+
+    fig = Figure(figsize=(width * scale, height * scale))
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(low[0], high[0])
+    ax.set_ylim(low[1], high[1])
+    ax.axis('off')
+
+    if len(graph) <= DETAIL_LIMIT and scale == INCHES_PER_UNIT:
+        _draw_detailed(ax, graph, positions)
+    else:
+        _draw_overview(ax, graph, positions)
+    if title:
+        ax.text((low[0] + high[0]) / 2, high[1] - 0.3, title, ha='center', va='top',
+                fontsize=16, fontweight='bold', gid='title')
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a Graphviz DOT or Mermaid flowchart '
+                                                 'in the style of the project diagrams')
+    parser.add_argument('graph', help='.dot/.gv or .mmd/.mermaid file')
+    parser.add_argument('-o', '--output', help='PNG to write (default: next to the input)')
+    parser.add_argument('--format', choices=('dot', 'mermaid'),
+                        help='input format (default: from the extension or contents)')
+    parser.add_argument('--title', help='title above the diagram (default: the graph label)')
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
+    graph = import_graph(args.graph, args.format)
+    print(f"Imported {len(graph):,} nodes and {graph.edge_count:,} edges from {args.graph}",
+          file=sys.stderr)
+    fig = draw_graph(graph, title=args.title)
+    if args.lint:
+        sys.exit(1 if lint_figure(fig) else 0)
+
+    # A canvas that would not fit the memory cap is rendered in bands anyway
+    width_px, height_px = fig.get_size_inches() * args.dpi
+    needed_mb = width_px * height_px * BYTES_PER_PIXEL * BAND_BUFFER_COPIES / 2**20
+    low_memory = args.low_memory or current_rss_mb() + needed_mb > args.max_rss_mb
+    output = args.output or os.path.splitext(args.graph)[0] + '.png'
+    for path in render_themes(fig, output, args.themes, dpi=args.dpi, low_memory=low_memory,
+                              max_rss_mb=args.max_rss_mb):
+        print(f"Diagram generated successfully: {path}")
+
+
+if __name__ == '__main__':
+    main()
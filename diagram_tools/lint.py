@@ -0,0 +1,640 @@
+"""
+Geometry linter for the diagram generator scripts
+Collects the bounding box of every tagged node and label of a figure, plus
+the paths of its arrows, and reports overlaps, labels crossed by arrows and
+out-of-bounds elements as JSON lines.  Extents are computed in bulk and
+pair finding is a NumPy-vectorized sweep line, so large diagrams stay fast.
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.collections import LineCollection
+from matplotlib.font_manager import findfont, get_font
+from matplotlib.lines import Line2D
+from matplotlib.patches import BoxStyle, ConnectionStyle, FancyArrowPatch, FancyBboxPatch, Patch
+from matplotlib.path import Path
+from matplotlib.text import Text
+
+# Roles (artist gids, see themes.py) that are shapes or text
+NODE_ROLES = {'external', 'process', 'store', 'decision', 'terminal', 'data',
+              'abandon', 'actor', 'usecase', 'panel'}
+LABEL_ROLES = {'label', 'flow-label', 'panel-label', 'title', 'footer'}
+# Text that belongs to the node it sits in, rather than floating over it
+CONTENT_ROLES = {'label', 'panel-label'}
+# Arrows and lines between nodes; untagged arrows (the traffic-weighted
+# flows of the DFD) count too
+FLOW_ROLES = {'flow', 'link', 'association'}
+
+NODE, LABEL = 0, 1
+
+
+class Flows:
+    """Arrow and line paths flattened to segments (x0, y0, x1, y1 in data coordinates)."""
+
+    def __init__(self, segments, owners, boxes, roles, texts, axes):
+        self.segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        self.owners = np.asarray(owners, dtype=np.intp)   # segment -> flow
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.roles = list(roles)
+        self.texts = list(texts)                          # the flow's label, if any
+        self.axes = np.asarray(axes, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def describe(self, i):
+        return {'role': self.roles[i], 'text': self.texts[i],
+                'bbox': [round(float(v), 3) for v in self.boxes[i]]}
+
+
+class Elements:
+    """Bounding boxes (x0, y0, x1, y1 in data coordinates) plus metadata."""
+
+    def __init__(self, boxes, kinds, roles, texts, axes, limits, flows=None, labelled=None):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.roles = list(roles)
+        self.texts = list(texts)
+        self.axes = np.asarray(axes, dtype=np.intp)
+        # Per-element axes limits: xmin, ymin, xmax, ymax
+        self.limits = np.asarray(limits, dtype=np.float64).reshape(-1, 4)
+        self.flows = flows if flows is not None else Flows([], [], [], [], [], [])
+        # The flow a flow label belongs to, -1 for everything else
+        self.labelled = (np.full(len(self.boxes), -1, dtype=np.intp) if labelled is None
+                         else np.asarray(labelled, dtype=np.intp))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def describe(self, i):
+        return {'role': self.roles[i], 'text': self.texts[i],
+                'bbox': [round(float(v), 3) for v in self.boxes[i]]}
+
+
+def _role(artist):
+    gid = artist.get_gid()
+    if gid is None:
+        return None
+    if gid in NODE_ROLES or gid.startswith('feature.'):
+        return NODE
+    if gid in LABEL_ROLES:
+        return LABEL
+    return None
+
+
+def _is_flow(artist):
+    if isinstance(artist, FancyArrowPatch):
+        return True
+    return (artist.get_gid() in FLOW_ROLES
+            and isinstance(artist, (Patch, Line2D, LineCollection)))
+
+
+def _is_padded_box(patch):
+    return (isinstance(patch, FancyBboxPatch)
+            and type(patch.get_boxstyle()) in (BoxStyle.Round, BoxStyle.Square)
+            and patch.get_mutation_aspect() == 1)
+
+
+def _patch_extents(patches, ax, to_data):
+    """Data extents of ``patches`` from their path vertices, transformed in bulk.
+
+    Bezier control points bound the curves they define and, for the boxes,
+    polygons and ellipses of these diagrams, lie on the extent itself.
+    """
+    vertices, counts, matrices, boxes, boxed = [], [], [], [], []
+    for i, patch in enumerate(patches):
+        if _is_padded_box(patch):
+            # Rounded and square boxes fill their padded rectangle exactly,
+            # so the box outline need not be built
+            pad = patch.get_boxstyle().pad * patch.get_mutation_scale()
+            x, y = patch.get_x(), patch.get_y()
+            box = (x - pad, y - pad, x + patch.get_width() + pad, y + patch.get_height() + pad)
+            if patch.get_data_transform() is ax.transData:
+                boxes.append(box)
+                boxed.append(i)
+                counts.append(0)
+                continue
+            points = np.reshape(box, (2, 2))
+        else:
+            path = patch.get_path()
+            points = path.vertices
+            if path.codes is not None:
+                points = points[(path.codes != Path.CLOSEPOLY) & (path.codes != Path.STOP)]
+        if patch.get_data_transform() is ax.transData:
+            matrices.append(patch.get_patch_transform().get_matrix())
+        else:
+            # Patches placed in axes or display coordinates
+            points = (patch.get_transform() + to_data).transform(points)
+            matrices.append(np.eye(3))
+        vertices.append(points)
+        counts.append(len(points))
+
+    extents = np.full((len(patches), 4), np.nan)
+    if boxes:
+        extents[boxed] = boxes
+    counts = np.asarray(counts, dtype=np.intp)
+    if counts.sum():
+        points = np.concatenate(vertices)
+        owner = np.repeat(np.arange(len(vertices)), counts[counts > 0])
+        matrices = np.asarray(matrices)[owner]
+        points = np.einsum('nij,nj->ni', matrices[:, :2, :2], points) + matrices[:, :2, 2]
+        starts = (np.cumsum(counts) - counts)[counts > 0]
+        extents[counts > 0, :2] = np.minimum.reduceat(points, starts)
+        extents[counts > 0, 2:] = np.maximum.reduceat(points, starts)
+    # Drop float noise from the shape arithmetic (0.5 - 0.4 - 0.1 is not 0),
+    # so shapes that touch do not count as overlapping
+    return extents.round(9) + 0.0
+
+
+def _layout_key(text):
+    """What a text's extent depends on besides its string and position, or None."""
+    if text.get_wrap() or text.get_transform_rotates_text():
+        return None  # the layout changes with the position
+    # FontProperties compare by hash; keying on it once spares rehashing
+    # both sides on every lookup
+    return (hash(text.get_fontproperties()), text.get_rotation(),
+            text.get_horizontalalignment(), text.get_verticalalignment(),
+            text.get_rotation_mode(), text.get_linespacing(),
+            text.get_usetex(), text.get_parse_math())
+
+
+def _font_height_metrics(prop, dpi):
+    """Ascent, descent and line gap that matplotlib pads the lines of a text
+    to, from the font's OS/2 or hhea table, or None."""
+    font = get_font(findfont(prop))
+    scale = prop.get_size_in_points() * dpi / 72 / font.get_sfnt_table('head')['unitsPerEm']
+    for table_name, gap, ascent, descent in (
+            ('OS/2', 'sTypoLineGap', 'sTypoAscender', 'sTypoDescender'),
+            ('hhea', 'lineGap', 'ascent', 'descent')):
+        table = font.get_sfnt_table(table_name)
+        if table is not None:
+            return table[ascent] * scale, -table[descent] * scale, table[gap] * scale
+    return None
+
+
+class _Layout:
+    """Display offsets, from the anchor, of the texts sharing one layout.
+
+    Upright texts aligned on their box are composed from the metrics of
+    their lines, so a line shared by many labels is measured once.  The
+    first text of each line count is also measured by matplotlib; if the
+    two disagree the layout falls back to measuring every distinct string.
+    """
+
+    def __init__(self, key, prop, renderer):
+        _, rotation, ha, va, rotation_mode, linespacing, usetex, _ = key
+        self.prop, self.linespacing, self.renderer = prop, linespacing, renderer
+        self.offsets, self.lines, self.checked = {}, {}, set()
+        self.font = None
+        if (rotation == 0 and rotation_mode in ('default', 'anchor') and not usetex
+                and va in ('top', 'center', 'bottom')):
+            self.font = _font_height_metrics(prop, renderer.dpi)
+            self.align = ({'left': 0, 'center': 0.5, 'right': 1}[ha],
+                          {'bottom': 0, 'center': 0.5, 'top': 1}[va])
+
+    def _line(self, line):
+        metrics = self.lines.get(line)
+        if metrics is None:
+            metrics = self.lines[line] = (self.renderer.get_text_width_height_descent(
+                line, self.prop, ismath=False) if line else (0, 0, 0))
+        return metrics
+
+    def _compose(self, string):
+        lines = [self._line(line) for line in string.split('\n')]
+        ascent, descent, gap = self.font
+        if self.linespacing == 'normal':
+            gap = gap if len(lines) > 1 else 0
+            height = sum(max(h - d, ascent) + max(d, descent) + gap for _, h, d in lines)
+        else:
+            height = len(lines) * self.linespacing * (ascent + descent)
+        width = max(w for w, _, _ in lines)
+        x0, y0 = -width * self.align[0], -height * self.align[1]
+        return np.array([[x0, y0], [x0 + width, y0 + height]])
+
+    def offset(self, text, anchor):
+        string = text.get_text()
+        offset = self.offsets.get(string)
+        if offset is not None:
+            return offset
+        lines = string.count('\n') + 1
+        if self.font is not None and '$' not in string:
+            offset = self._compose(string)
+            if lines in self.checked:
+                self.offsets[string] = offset
+                return offset
+        measured = text.get_window_extent(self.renderer).get_points() - anchor
+        if offset is not None:
+            if np.allclose(offset, measured, rtol=0, atol=1e-6):
+                self.checked.add(lines)
+            else:
+                self.font = None
+        self.offsets[string] = measured
+        return measured
+
+
+def _text_extents(texts, renderer, to_data):
+    """Data extents of ``texts``.  Each distinct layout is measured once and
+    placed at every anchor that uses it; anchors are transformed in bulk."""
+    anchors = np.empty((len(texts), 2))
+    by_transform = {}
+    for i, text in enumerate(texts):
+        transform = text.get_transform()
+        x, y = text.get_position()
+        if not (isinstance(x, (int, float)) and isinstance(y, (int, float))):
+            x, y = text.get_unitless_position()  # dates and other units
+        group = by_transform.setdefault(id(transform), (transform, [], []))
+        group[1].append(i)
+        group[2].append((x, y))
+    for transform, indices, positions in by_transform.values():
+        anchors[indices] = transform.transform(np.asarray(positions, dtype=np.float64))
+
+    offsets, layouts = [], {}
+    for i, text in enumerate(texts):
+        key = _layout_key(text)
+        if key is None:
+            offsets.append(text.get_window_extent(renderer).get_points() - anchors[i])
+            continue
+        layout = layouts.get(key)
+        if layout is None:
+            layout = layouts[key] = _Layout(key, text.get_fontproperties(), renderer)
+        offsets.append(layout.offset(text, anchors[i]))
+
+    corners = anchors[:, None] + np.reshape(offsets, (-1, 2, 2))
+    extent = to_data.transform(corners.reshape(-1, 2)).reshape(-1, 2, 2)
+    return np.hstack([extent.min(axis=1), extent.max(axis=1)])
+
+
+# Points per arc3 arrow when its curve is flattened in bulk
+ARC_POINTS = 16
+
+
+def _is_plain_arc(artist):
+    """An arrow whose path follows from its end points alone: arc3, no
+    patches to clip against, and a plain line or line-and-head style.
+
+    The end points are read from matplotlib's private ``_posA_posB``; where
+    it is missing the arrow is flattened from its path like any other.
+    """
+    if not (isinstance(artist, FancyArrowPatch)
+            and getattr(artist, '_posA_posB', None) is not None
+            and artist.patchA is None and artist.patchB is None
+            and isinstance(artist.get_connectionstyle(), ConnectionStyle.Arc3)):
+        return False
+    arrow = getattr(artist.get_arrowstyle(), 'arrow', None)
+    return isinstance(arrow, str) and not arrow.strip('<|->')
+
+
+def _arc_segments(arrows, to_data, dpi):
+    """Segments of arc3 arrows and their heads, evaluated for all arrows at once.
+
+    The connecting curve is the quadratic Bezier from A to B through the
+    arc3 control point, with its ends pulled in by the shrink along the
+    tangent; heads are the two strokes of the arrow style's head_length and
+    head_width back from the tip.
+    """
+    points = dpi / 72
+    ends = np.empty((len(arrows), 2, 2))
+    rads, shrink, head, tips = (np.empty(len(arrows)), np.empty((len(arrows), 2)),
+                                np.empty((len(arrows), 2)), np.zeros((len(arrows), 2), bool))
+    by_transform = {}
+    for i, arrow in enumerate(arrows):
+        transform = arrow.get_transform()
+        group = by_transform.setdefault(id(transform), (transform, [], []))
+        group[1].append(i)
+        group[2].append(arrow._posA_posB)
+        style = arrow.get_arrowstyle()
+        rads[i] = arrow.get_connectionstyle().rad
+        shrink[i] = arrow.shrinkA * points, arrow.shrinkB * points
+        scale = arrow.get_mutation_scale() * points
+        head[i] = style.head_length * scale, style.head_width * scale
+        tips[i] = style.arrow.startswith('<'), style.arrow.endswith('>')
+    for transform, indices, positions in by_transform.values():
+        ends[indices] = transform.transform(
+            np.asarray(positions, dtype=np.float64).reshape(-1, 2)).reshape(-1, 2, 2)
+    a, b = ends[:, 0], ends[:, 1]
+    d = b - a
+    control = (a + b) / 2 + rads[:, None] * np.column_stack([d[:, 1], -d[:, 0]])
+
+    def unit(v):
+        length = np.hypot(v[:, 0], v[:, 1])[:, None]
+        return np.divide(v, length, out=np.zeros_like(v), where=length > 0)
+
+    # Tangents pointing out of the curve at each end
+    out_a, out_b = unit(a - control), unit(b - control)
+    a = a - out_a * shrink[:, :1]
+    b = b - out_b * shrink[:, 1:]
+    t = np.linspace(0, 1, ARC_POINTS)[None, :, None]
+    curve = ((1 - t) ** 2 * a[:, None] + 2 * (1 - t) * t * control[:, None]
+             + t ** 2 * b[:, None])
+    strokes = []
+    for tip, out, has_head in ((a, out_a, tips[:, 0]), (b, out_b, tips[:, 1])):
+        across = np.column_stack([-out[:, 1], out[:, 0]])
+        back = tip - out * head[:, :1]
+        for side in (1, -1):
+            stroke = np.hstack([tip, back + side * across * head[:, 1:]])
+            strokes.append(np.where(has_head[:, None], stroke, np.nan))
+    curve = to_data.transform(curve.reshape(-1, 2)).reshape(len(arrows), ARC_POINTS, 2)
+    strokes = to_data.transform(np.stack(strokes, axis=1).reshape(-1, 2)).reshape(len(arrows), 4, 4)
+    return [np.vstack([np.hstack([line[:-1], line[1:]]), stroke[~np.isnan(stroke[:, 0])]])
+            for line, stroke in zip(curve, strokes)]
+
+
+def _flow_segments(artist, to_data):
+    """Segments (x0, y0, x1, y1) of an arrow or line, curves flattened."""
+    if isinstance(artist, LineCollection):
+        paths = artist.get_paths()
+    else:
+        paths = [artist.get_path()]
+    # Curves are flattened in display space, to pixel accuracy
+    transform = artist.get_transform()
+    lines = [to_data.transform(line)
+             for path in paths
+             for line in path.to_polygons(transform, closed_only=False)
+             if len(line) > 1]
+    segments = [np.hstack([line[:-1], line[1:]]) for line in lines]
+    return np.vstack(segments) if segments else np.empty((0, 4))
+
+
+def collect_elements(fig):
+    """Measure every tagged node, label and flow of ``fig`` in data coordinates."""
+    renderer = RendererAgg(1, 1, fig.dpi)
+    boxes, kinds, roles, texts, axes, limits, labelled = [], [], [], [], [], [], []
+    flow_segments, flow_roles, flow_texts, flow_axes = [], [], [], []
+    for index, ax in enumerate(fig.axes):
+        to_data = ax.transData.inverted()
+        (xmin, xmax), (ymin, ymax) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        patches, labels, label_kinds, label_flows, flows, flow_labels = [], [], [], [], [], {}
+        # Children in drawing order: a flow label follows the arrow it labels
+        for artist in ax.get_children():
+            if not artist.get_visible():
+                continue
+            if _is_flow(artist):
+                flows.append(artist)
+                continue
+            kind = _role(artist)
+            if kind is None:
+                continue
+            if isinstance(artist, Text):
+                if not artist.get_text().strip():
+                    continue
+                labels.append(artist)
+                label_kinds.append(kind)
+                if artist.get_gid() == 'flow-label' and flows:
+                    label_flows.append(len(flow_segments) + len(flows) - 1)
+                    flow_labels[len(flows) - 1] = ' '.join(artist.get_text().split())
+                else:
+                    label_flows.append(-1)
+            elif isinstance(artist, Patch):
+                patches.append(artist)
+
+        arcs = [flow for flow in flows if _is_plain_arc(flow)]
+        arc_segments = dict(zip(map(id, arcs), _arc_segments(arcs, to_data, fig.dpi))) if arcs else {}
+        for position, flow in enumerate(flows):
+            segments = arc_segments.get(id(flow))
+            flow_segments.append(segments if segments is not None
+                                 else _flow_segments(flow, to_data))
+            flow_roles.append(flow.get_gid())
+            flow_texts.append(flow_labels.get(position, ''))
+            flow_axes.append(index)
+
+        extents = _patch_extents(patches, ax, to_data)
+        measured = ~np.isnan(extents[:, 0])
+        patches = [patch for patch, keep in zip(patches, measured) if keep]
+        boxes += [extents[measured], _text_extents(labels, renderer, to_data)]
+        kinds += [NODE] * len(patches) + label_kinds
+        roles += [artist.get_gid() for artist in [*patches, *labels]]
+        texts += [''] * len(patches) + [' '.join(text.get_text().split()) for text in labels]
+        labelled += [-1] * len(patches) + label_flows
+        axes += [index] * (len(patches) + len(labels))
+        limits += [(xmin, ymin, xmax, ymax)] * (len(patches) + len(labels))
+
+    counts = [len(segments) for segments in flow_segments]
+    segments = np.vstack(flow_segments) if flow_segments else np.empty((0, 4))
+    xs, ys = segments[:, [0, 2]], segments[:, [1, 3]]
+    starts = (np.cumsum(counts) - counts)
+    nonempty = np.asarray(counts) > 0
+    flow_boxes = np.full((len(counts), 4), np.nan)
+    if segments.size:
+        flow_boxes[nonempty] = np.column_stack([
+            np.minimum.reduceat(xs.min(axis=1), starts[nonempty]),
+            np.minimum.reduceat(ys.min(axis=1), starts[nonempty]),
+            np.maximum.reduceat(xs.max(axis=1), starts[nonempty]),
+            np.maximum.reduceat(ys.max(axis=1), starts[nonempty])])
+    flows = Flows(segments, np.repeat(np.arange(len(counts)), counts),
+                  flow_boxes, flow_roles, flow_texts, flow_axes)
+    return Elements(np.vstack(boxes) if boxes else [], kinds, roles, texts, axes, limits,
+                    flows, labelled)
+
+
+def overlapping_pairs(boxes, groups=None, tolerance=0.0, block=65536):
+    """Return (i, j) index arrays of boxes whose interiors intersect.
+
+    Sweep line: after sorting by x0, the boxes that can overlap box i in x
+    are exactly those that start before box i ends, a contiguous run found
+    with one searchsorted.  Runs are expanded into candidate pairs in blocks
+    and filtered on y (and ``groups``) without Python loops.  The sweep runs
+    along y instead when that gives fewer candidates.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    n = len(boxes)
+    if n < 2:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+
+    # Sweep along whichever axis yields fewer candidates: column layouts
+    # like the flowchart overlap heavily in x but hardly at all in y
+    sweeps = []
+    for axis in (0, 1):
+        order = np.argsort(boxes[:, axis], kind='stable')
+        lo, hi = boxes[order, axis], boxes[order, axis + 2]
+        # Candidates for sorted position i are positions i+1 .. end[i]-1
+        end = np.searchsorted(lo, hi - tolerance, side='left')
+        counts = np.maximum(end - np.arange(1, n + 1), 0)
+        sweeps.append((int(counts.sum()), axis, order, counts))
+    _, axis, order, counts = min(sweeps, key=lambda sweep: sweep[0])
+    # Only the other axis still needs testing
+    y0, y1 = boxes[order, 1 - axis], boxes[order, 3 - axis]
+    group = None if groups is None else np.asarray(groups)[order]
+
+    cumulative = np.cumsum(counts)
+    found_i, found_j = [], []
+    start = 0
+    while start < n:
+        # Take as many boxes as fit in about `block` candidate pairs
+        done = cumulative[start - 1] if start else 0
+        stop = int(np.searchsorted(cumulative, done + block, side='right'))
+        stop = min(max(stop, start + 1), n)
+        block_counts = counts[start:stop]
+        total = int(block_counts.sum())
+        if total:
+            i = np.repeat(np.arange(start, stop), block_counts)
+            run_start = np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+            j = i + 1 + (np.arange(total) - run_start)
+            hit = (y0[j] < y1[i] - tolerance) & (y0[i] < y1[j] - tolerance)
+            if group is not None:
+                hit &= group[i] == group[j]
+            found_i.append(order[i[hit]])
+            found_j.append(order[j[hit]])
+        start = stop
+
+    if not found_i:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    return np.concatenate(found_i), np.concatenate(found_j)
+
+
+def _segments_enter(segments, boxes):
+    """Whether each segment passes through the interior of its box (Liang-Barsky)."""
+    x0, y0, x1, y1 = segments.T
+    dx, dy = x1 - x0, y1 - y0
+    t0, t1 = np.zeros(len(segments)), np.ones(len(segments))
+    inside = np.ones(len(segments), dtype=bool)
+    for p, q in ((-dx, x0 - boxes[:, 0]), (dx, boxes[:, 2] - x0),
+                 (-dy, y0 - boxes[:, 1]), (dy, boxes[:, 3] - y0)):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = q / p
+        # Parallel to this edge: inside only if strictly on the inner side
+        inside &= (p != 0) | (q > 0)
+        t0 = np.where(p < 0, np.maximum(t0, r), t0)
+        t1 = np.where(p > 0, np.minimum(t1, r), t1)
+    return inside & (t0 < t1)
+
+
+def crossing_pairs(boxes, box_groups, flows):
+    """Return (box index, flow index) pairs where a flow passes through a box.
+
+    Segment extents and boxes go through one overlapping_pairs sweep; the
+    candidate segments are then clipped against their box exactly.
+    """
+    segments = flows.segments
+    if not len(boxes) or not len(segments):
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    extents = np.column_stack([np.minimum(segments[:, 0], segments[:, 2]),
+                               np.minimum(segments[:, 1], segments[:, 3]),
+                               np.maximum(segments[:, 0], segments[:, 2]),
+                               np.maximum(segments[:, 1], segments[:, 3])])
+    n = len(boxes)
+    groups = np.concatenate([box_groups, flows.axes[flows.owners]])
+    first, second = overlapping_pairs(np.vstack([boxes, extents]), groups)
+    # Keep (box, segment) pairs only, box first
+    box = np.where(first < n, first, second)
+    segment = np.where(first < n, second, first) - n
+    mixed = (first < n) != (second < n)
+    box, segment = box[mixed], segment[mixed]
+    enters = _segments_enter(segments[segment], boxes[box])
+    pairs = np.unique(np.column_stack([box[enters], flows.owners[segment[enters]]]), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def out_of_bounds(elements):
+    """Indices of elements that extend past their axes limits."""
+    b, lim = elements.boxes, elements.limits
+    outside = ((b[:, 0] < lim[:, 0]) | (b[:, 1] < lim[:, 1]) |
+               (b[:, 2] > lim[:, 2]) | (b[:, 3] > lim[:, 3]))
+    return np.flatnonzero(outside)
+
+
+def lint_elements(elements, tolerance=0.0):
+    """Yield findings (dicts) for overlapping and out-of-bounds elements."""
+    for i in out_of_bounds(elements):
+        yield {'rule': 'out-of-bounds', 'elements': [elements.describe(i)],
+               'limits': [float(v) for v in elements.limits[i]]}
+
+    first, second = overlapping_pairs(elements.boxes, elements.axes, tolerance)
+    kinds = elements.kinds
+    # Order every pair as (node, label) when it mixes the two
+    swap = (kinds[first] == LABEL) & (kinds[second] == NODE)
+    first, second = np.where(swap, second, first), np.where(swap, first, second)
+
+    boxes = elements.boxes
+    node, label = boxes[first], boxes[second]
+    centers = (label[:, :2] + label[:, 2:]) / 2
+    is_content = np.array([elements.roles[j] in CONTENT_ROLES for j in second.tolist()],
+                          dtype=bool).reshape(-1)
+    # A node's own text sits centered inside it and only matters when it spills out
+    own = (is_content & (kinds[first] == NODE) & (kinds[second] == LABEL) &
+           np.all((node[:, :2] <= centers) & (centers <= node[:, 2:]), axis=1))
+    contained = np.all((node[:, :2] <= label[:, :2]) & (label[:, 2:] <= node[:, 2:]), axis=1)
+
+    rules = np.where(kinds[first] == kinds[second],
+                     np.where(kinds[first] == NODE, 'node-overlap', 'label-overlap'),
+                     np.where(own, 'label-overflow', 'label-over-node'))
+    for k in np.flatnonzero(~(own & contained)).tolist():
+        yield {'rule': str(rules[k]),
+               'elements': [elements.describe(first[k]), elements.describe(second[k])]}
+
+    # Labels crossed by an arrow or line, other than the flow they label
+    labels = np.flatnonzero(kinds == LABEL)
+    label, flow = crossing_pairs(boxes[labels], elements.axes[labels], elements.flows)
+    label = labels[label]
+    for k in np.flatnonzero(elements.labelled[label] != flow).tolist():
+        yield {'rule': 'label-over-flow',
+               'elements': [elements.describe(label[k]), elements.flows.describe(flow[k])]}
+
+
+def lint_figure(fig, stream=sys.stdout, tolerance=0.0):
+    """Lint ``fig``, write findings to ``stream`` as JSON lines; return the count."""
+    count = 0
+    for finding in lint_elements(collect_elements(fig), tolerance):
+        stream.write(json.dumps(finding) + '\n')
+        count += 1
+    return count
+
+
+def _bench_figure(elements, seed=0):
+    """A diagram-like figure of about ``elements`` nodes and labels: labelled
+    boxes, every fifth with a labelled arrow below it, on a canvas that keeps
+    most of them apart.  Labels are two lines drawn from a small vocabulary,
+    as diagram labels share most of their words."""
+    from matplotlib.figure import Figure
+
+    # Each box brings its label, and every fifth box a flow label
+    n = -(-elements * 5 // 11)
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(n) * 8
+    # Half an inch per unit, so labels fit their boxes as in the scripts
+    fig = Figure(figsize=(side / 2, side / 2))
+    ax = fig.add_subplot()
+    ax.set_xlim(0, side)
+    ax.set_ylim(0, side)
+    words = ['Guest', 'Host', 'Booking', 'Payment', 'Property', 'Review', 'Search',
+             'Validate', 'Notify', 'Display', 'Update', 'Record', 'Request', 'Status']
+    xy = rng.uniform(0, side - 3, size=(n, 2))
+    names = rng.integers(0, len(words), size=(n, 2))
+    for i, ((x, y), (a, b)) in enumerate(zip(xy.tolist(), names.tolist())):
+        # add_artist skips the per-patch data limit update of add_patch
+        ax.add_artist(FancyBboxPatch((x, y), 2.5, 0.8, boxstyle='round,pad=0.1', gid='process'))
+        ax.text(x + 1.25, y + 0.4, f'{words[a]}\n{words[b]}', ha='center', va='center',
+                fontsize=8, gid='label')
+        if i % 5 == 4:
+            ax.add_artist(FancyArrowPatch((x + 1.25, y - 0.1), (x + 1.25, y - 1.6),
+                                         arrowstyle='->', mutation_scale=20, gid='flow'))
+            ax.text(x + 1.6, y - 0.85, 'Yes', fontsize=7, ha='center', va='center',
+                    gid='flow-label')
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the diagram geometry linter')
+    parser.add_argument('--bench', type=int, default=50_000, metavar='N',
+                        help='number of nodes and labels in the benchmark figure '
+                             '(default: 50,000)')
+    args = parser.parse_args()
+
+    fig = _bench_figure(args.bench)
+    children = [artist for ax in fig.axes for artist in ax.get_children()]
+    flows = sum(map(_is_flow, children))
+    elements = sum(_role(artist) is not None for artist in children)
+    started = time.perf_counter()
+    findings = lint_figure(fig, stream=io.StringIO())
+    elapsed = time.perf_counter() - started
+    print(f"{elements:,} nodes and labels, {flows:,} arrows, "
+          f"{findings:,} findings in {elapsed:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Theme variants for the diagram generator scripts
+A diagram is laid out once with each artist tagged by its role (its gid);
+a theme then only overrides style properties per role, so every variant is
+rendered from the same figure without rebuilding or re-measuring it
+"""
+
+import multiprocessing
+import os
+
+from matplotlib.text import Text
+
+from diagram_tools.banded import output_region, save_banded
+
+# Role -> artist properties.  'light' reproduces the original colors of the
+# scripts; other themes list only the roles they change.  Text roles may
+# carry a 'bbox' entry applied to the text's background box.
+LIGHT = {
+    'background': 'white',
+    'text': {'color': 'black'},
+    'title': {'color': 'black'},
+    'footer': {'color': 'gray'},
+    'label': {'color': 'black'},
+    'flow-label': {'color': 'black', 'bbox': {'facecolor': 'white', 'edgecolor': 'none'}},
+    'panel-label': {'color': 'black', 'bbox': {'facecolor': 'white', 'edgecolor': 'black'}},
+    'legend': {'facecolor': 'white', 'edgecolor': 'black'},
+    'legend-plain': {'facecolor': 'white', 'edgecolor': '0.8'},
+    'legend-text': {'color': 'black'},
+    # Data Flow Diagram / flowchart shapes
+    'external': {'facecolor': '#FFE5B4', 'edgecolor': 'black'},
+    'process': {'facecolor': '#E8F4F8', 'edgecolor': '#2c5aa0'},
+    'store': {'facecolor': '#F0E68C', 'edgecolor': 'black'},
+    'decision': {'facecolor': '#FFE5B4', 'edgecolor': '#FF8C00'},
+    'terminal': {'facecolor': '#90EE90', 'edgecolor': '#008000'},
+    'data': {'facecolor': '#F0E68C', 'edgecolor': '#8B6914'},
+    'flow': {'color': '#333333'},
+    # Use case diagram
+    'actor': {'facecolor': '#f7f7f7', 'edgecolor': '#333'},
+    'usecase': {'facecolor': '#e8f1ff', 'edgecolor': '#2c5aa0'},
+    'association': {'color': '#666'},
+    # Features diagram
+    'link': {'color': 'gray'},
+    'panel': {'facecolor': '#ECF0F1', 'edgecolor': 'black'},
+    'feature.auth': {'facecolor': '#4A90E2', 'edgecolor': 'black'},
+    'feature.property': {'facecolor': '#50C878', 'edgecolor': 'black'},
+    'feature.booking': {'facecolor': '#FF6B6B', 'edgecolor': 'black'},
+    'feature.payment': {'facecolor': '#FFD93D', 'edgecolor': 'black'},
+    'feature.review': {'facecolor': '#9B59B6', 'edgecolor': 'black'},
+    'feature.search': {'facecolor': '#3498DB', 'edgecolor': 'black'},
+    'feature.message': {'facecolor': '#E67E22', 'edgecolor': 'black'},
+    'feature.image': {'facecolor': '#1ABC9C', 'edgecolor': 'black'},
+    'feature.notification': {'facecolor': '#34495E', 'edgecolor': 'black'},
+    'feature.admin': {'facecolor': '#E74C3C', 'edgecolor': 'black'},
+    'feature.additional': {'facecolor': '#95A5A6', 'edgecolor': 'black'},
+    'feature.security': {'facecolor': '#C0392B', 'edgecolor': 'black'},
+}
+
+DARK = {
+    'background': '#1E1E1E',
+    'text': {'color': '#E6E6E6'},
+    'title': {'color': '#FFFFFF'},
+    'footer': {'color': '#9A9A9A'},
+    'label': {'color': '#E6E6E6'},
+    'flow-label': {'color': '#E6E6E6', 'bbox': {'facecolor': '#2B2B2B', 'edgecolor': 'none'}},
+    'panel-label': {'color': '#E6E6E6', 'bbox': {'facecolor': '#2B2B2B', 'edgecolor': '#BBBBBB'}},
+    'legend': {'facecolor': '#2B2B2B', 'edgecolor': '#BBBBBB'},
+    'legend-plain': {'facecolor': '#2B2B2B', 'edgecolor': '#555555'},
+    'legend-text': {'color': '#E6E6E6'},
+    'external': {'facecolor': '#5C4326', 'edgecolor': '#E0B98A'},
+    'process': {'facecolor': '#1F3A4D', 'edgecolor': '#6CA6E0'},
+    'store': {'facecolor': '#4D4A1F', 'edgecolor': '#D8CF7A'},
+    'decision': {'facecolor': '#5C4326', 'edgecolor': '#FFA64D'},
+    'terminal': {'facecolor': '#1F4D2A', 'edgecolor': '#6FD98A'},
+    'data': {'facecolor': '#4D4A1F', 'edgecolor': '#D8B84D'},
+    'flow': {'color': '#BBBBBB'},
+    'actor': {'facecolor': '#2B2B2B', 'edgecolor': '#BBBBBB'},
+    'usecase': {'facecolor': '#1F3A4D', 'edgecolor': '#6CA6E0'},
+    'association': {'color': '#8A8A8A'},
+    'link': {'color': '#9A9A9A'},
+    'panel': {'facecolor': '#2B2B2B', 'edgecolor': '#BBBBBB'},
+    # Darker shades of the feature hues, so the light label text stays readable
+    'feature.auth': {'facecolor': '#1F4E7A', 'edgecolor': '#BBBBBB'},
+    'feature.property': {'facecolor': '#1E6B45', 'edgecolor': '#BBBBBB'},
+    'feature.booking': {'facecolor': '#8A2F2F', 'edgecolor': '#BBBBBB'},
+    'feature.payment': {'facecolor': '#7A6212', 'edgecolor': '#BBBBBB'},
+    'feature.review': {'facecolor': '#5B3470', 'edgecolor': '#BBBBBB'},
+    'feature.search': {'facecolor': '#1B5A85', 'edgecolor': '#BBBBBB'},
+    'feature.message': {'facecolor': '#8A4A12', 'edgecolor': '#BBBBBB'},
+    'feature.image': {'facecolor': '#12695A', 'edgecolor': '#BBBBBB'},
+    'feature.notification': {'facecolor': '#34495E', 'edgecolor': '#BBBBBB'},
+    'feature.admin': {'facecolor': '#8C2A22', 'edgecolor': '#BBBBBB'},
+    'feature.additional': {'facecolor': '#4F5B5C', 'edgecolor': '#BBBBBB'},
+    'feature.security': {'facecolor': '#7A231B', 'edgecolor': '#BBBBBB'},
+}
+
+# Okabe-Ito palette, distinguishable under the common color-vision deficiencies
+COLORBLIND = {
+    'external': {'facecolor': '#E69F00', 'edgecolor': 'black'},
+    'process': {'facecolor': '#56B4E9', 'edgecolor': '#0072B2'},
+    'store': {'facecolor': '#F0E442', 'edgecolor': 'black'},
+    'decision': {'facecolor': '#E69F00', 'edgecolor': '#D55E00'},
+    'terminal': {'facecolor': '#009E73', 'edgecolor': 'black'},
+    'data': {'facecolor': '#F0E442', 'edgecolor': '#0072B2'},
+    'usecase': {'facecolor': '#56B4E9', 'edgecolor': '#0072B2'},
+    # Eight hues for twelve categories: repeats are told apart by hatching
+    'feature.auth': {'facecolor': '#0072B2', 'hatch': None},
+    'feature.property': {'facecolor': '#009E73', 'hatch': None},
+    'feature.booking': {'facecolor': '#D55E00', 'hatch': None},
+    'feature.payment': {'facecolor': '#F0E442', 'hatch': None},
+    'feature.review': {'facecolor': '#CC79A7', 'hatch': None},
+    'feature.search': {'facecolor': '#56B4E9', 'hatch': None},
+    'feature.message': {'facecolor': '#E69F00', 'hatch': None},
+    'feature.image': {'facecolor': '#009E73', 'hatch': '//'},
+    'feature.notification': {'facecolor': '#999999', 'hatch': None},
+    'feature.admin': {'facecolor': '#D55E00', 'hatch': '//'},
+    'feature.additional': {'facecolor': '#DDDDDD', 'hatch': None},
+    'feature.security': {'facecolor': '#CC79A7', 'hatch': '//'},
+}
+
+# Features may gain hatching in other themes; reset it in the base theme
+for _role in LIGHT:
+    if _role.startswith('feature.'):
+        LIGHT[_role]['hatch'] = None
+
+
+def _resolve(overrides):
+    """Merge ``overrides`` role by role onto 'light', so every role is complete."""
+    theme = dict(LIGHT)
+    for role, props in overrides.items():
+        theme[role] = {**LIGHT[role], **props} if isinstance(props, dict) else props
+    return theme
+
+
+def _with_swatches(theme):
+    """Add 'swatch.*' roles: legend entries for features, fill only (no outline)."""
+    for role, props in list(theme.items()):
+        if role.startswith('feature.'):
+            theme['swatch.' + role[len('feature.'):]] = {
+                key: value for key, value in props.items() if key != 'edgecolor'}
+    return theme
+
+
+# A theme lists only what it changes; switching themes on the same figure
+# must still reset everything the previous theme set
+THEMES = {
+    'light': _with_swatches(dict(LIGHT)),
+    'dark': _with_swatches(_resolve(DARK)),
+    'colorblind': _with_swatches(_resolve(COLORBLIND)),
+}
+
+
+def get_theme(theme):
+    """Return a theme dict from a name or a partial dict of overrides."""
+    if isinstance(theme, str):
+        if theme not in THEMES:
+            raise ValueError(f"unknown theme {theme!r}; choose from {', '.join(THEMES)}")
+        return THEMES[theme]
+    return _with_swatches(_resolve(theme))
+
+
+def parse_themes(text):
+    """Parse a --themes value ('light,dark' or 'all') into theme names."""
+    names = list(THEMES) if text == 'all' else [n.strip() for n in text.split(',') if n.strip()]
+    for name in names:
+        get_theme(name)
+    return names
+
+
+def add_render_arguments(parser):
+    """Add the options every generator script shares to an argparse parser:
+    --themes, --dpi, --low-memory, --max-rss-mb and --lint."""
+    parser.add_argument('--themes', type=parse_themes, default=['light'],
+                        help="comma-separated themes to render, or 'all' (default: light)")
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--low-memory', action='store_true',
+                        help='rasterize in horizontal bands streamed to the PNG encoder')
+    parser.add_argument('--max-rss-mb', type=float, default=256,
+                        help='peak memory cap for --low-memory (default: 256)')
+    parser.add_argument('--lint', action='store_true',
+                        help='check node and label geometry, print findings as JSON lines, '
+                             'skip rendering')
+
+
+def tag_legend(legend, roles, frame='legend'):
+    """Give a legend's frame, texts and handles (in order) their roles."""
+    legend.get_frame().set_gid(frame)
+    for text in [legend.get_title(), *legend.get_texts()]:
+        text.set_gid('legend-text')
+    for handle, role in zip(legend.legend_handles, roles):
+        handle.set_gid(role)
+
+
+def apply_theme(fig, theme):
+    """Restyle every tagged artist of ``fig`` in place; returns the theme.
+
+    Untagged text falls back to the 'text' role; other untagged artists,
+    like the traffic-weighted flows of the DFD, keep their own style.
+    """
+    theme = get_theme(theme)
+    fig.set_facecolor(theme['background'])
+    for artist in fig.findobj():
+        role = artist.get_gid()
+        if role is None and isinstance(artist, Text):
+            role = 'text'
+        props = theme.get(role)
+        if not isinstance(props, dict):
+            continue
+        props = dict(props)
+        bbox = props.pop('bbox', None)
+        artist.set(**props)
+        if bbox and isinstance(artist, Text) and artist.get_bbox_patch() is not None:
+            artist.get_bbox_patch().set(**bbox)
+    return theme
+
+
+def themed_path(path, name, base='light'):
+    """'out/diagram.png' -> 'out/diagram-dark.png' (the base theme keeps the name)."""
+    if name == base:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f'{stem}-{name}{ext}'
+
+
+def _available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _render_theme(fig, name, out, region, dpi, low_memory, max_rss_mb):
+    theme = apply_theme(fig, name)
+    if low_memory:
+        save_banded(fig, out, dpi=dpi, max_rss_mb=max_rss_mb,
+                    facecolor=theme['background'], bbox_inches=region)
+    else:
+        fig.savefig(out, dpi=dpi, bbox_inches=region,
+                    facecolor=theme['background'], edgecolor='none')
+
+
+def render_themes(fig, path, themes, dpi=300, low_memory=False, max_rss_mb=256):
+    """Save ``fig`` once per theme and return the paths written.
+
+    The tight bounding box is measured once and reused: a theme changes
+    only colors, never extents, so each variant costs a single draw and PNG
+    encode.  With fork and more than one CPU the variants are drawn in
+    parallel child processes that inherit the laid-out figure; on a single
+    CPU, and for --low-memory renders (kept sequential to honour the cap),
+    they are drawn one after another and the time grows with each theme.
+    """
+    region = output_region(fig, dpi)
+    jobs = [(name, themed_path(path, name)) for name in themes]
+
+    parallel = (len(jobs) > 1 and not low_memory and _available_cpus() > 1
+                and 'fork' in multiprocessing.get_all_start_methods())
+    if parallel:
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_render_theme,
+                                   args=(fig, name, out, region, dpi, False, max_rss_mb))
+                   for name, out in jobs]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        failed = [name for (name, _), worker in zip(jobs, workers) if worker.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"rendering failed for theme(s): {', '.join(failed)}")
+        # Leave the parent's figure styled like the last variant, as the
+        # sequential path does
+        apply_theme(fig, jobs[-1][0])
+    else:
+        for name, out in jobs:
+            _render_theme(fig, name, out, region, dpi, low_memory, max_rss_mb)
+
+    return [out for _, out in jobs]
@@ -2,14 +2,27 @@
 """
 Generate a comprehensive feature diagram for Airbnb Clone Backend
 Exports as PNG file without requiring Draw.io
+--themes renders extra color variants from the same layout; --lint reports
+overlapping or out-of-bounds shapes and labels as JSON lines instead
 """
 
+import argparse
+import os
+import sys
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch, ConnectionPatch
 import matplotlib.patches as mpatches
 from matplotlib.font_manager import FontProperties
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from diagram_tools import add_render_arguments, render_themes, tag_legend
+from diagram_tools.lint import lint_figure
+
+parser = argparse.ArgumentParser(description='Generate the features & functionalities diagram')
+add_render_arguments(parser)
+args = parser.parse_args()
+
 # Set up the figure
 fig, ax = plt.subplots(1, 1, figsize=(20, 16))
 ax.set_xlim(0, 20)
@@ -28,49 +41,50 @@ colors = {
     'image': '#1ABC9C',
     'notification': '#34495E',
     'admin': '#E74C3C',
-    'additional': '#95A5A6'
+    'additional': '#95A5A6',
+    'security': '#C0392B'
 }
 
 # Define feature boxes with positions and sizes
 features = [
     # Row 1 - Core Features
-    {'name': 'User Authentication\n&\nAuthorization', 'pos': (1, 13), 'size': (3.5, 2.5), 'color': colors['auth'],
+    {'name': 'User Authentication\n&\nAuthorization', 'pos': (1, 13), 'size': (3.5, 2.5), 'category': 'auth',
      'details': ['Registration', 'Login', 'OAuth', 'Profile', 'Roles']},
     
-    {'name': 'Property\nManagement', 'pos': (5.5, 13), 'size': (3.5, 2.5), 'color': colors['property'],
+    {'name': 'Property\nManagement', 'pos': (5.5, 13), 'size': (3.5, 2.5), 'category': 'property',
      'details': ['CRUD', 'Location', 'Pricing', 'Amenities', 'Calendar']},
     
-    {'name': 'Booking\nSystem', 'pos': (10, 13), 'size': (3.5, 2.5), 'color': colors['booking'],
+    {'name': 'Booking\nSystem', 'pos': (10, 13), 'size': (3.5, 2.5), 'category': 'booking',
      'details': ['Create', 'Manage', 'Status', 'Cancellation']},
     
-    {'name': 'Payment\nProcessing', 'pos': (14.5, 13), 'size': (3.5, 2.5), 'color': colors['payment'],
+    {'name': 'Payment\nProcessing', 'pos': (14.5, 13), 'size': (3.5, 2.5), 'category': 'payment',
      'details': ['Gateway', 'Transactions', 'Payouts', 'Refunds']},
     
     # Row 2 - Secondary Features
-    {'name': 'Reviews &\nRatings', 'pos': (1, 9.5), 'size': (3.5, 2.5), 'color': colors['review'],
+    {'name': 'Reviews &\nRatings', 'pos': (1, 9.5), 'size': (3.5, 2.5), 'category': 'review',
      'details': ['Submit', 'Display', 'Moderate', 'Aggregate']},
     
-    {'name': 'Search &\nFiltering', 'pos': (5.5, 9.5), 'size': (3.5, 2.5), 'color': colors['search'],
+    {'name': 'Search &\nFiltering', 'pos': (5.5, 9.5), 'size': (3.5, 2.5), 'category': 'search',
      'details': ['Location', 'Filters', 'Sorting', 'Map']},
     
-    {'name': 'Messaging &\nCommunication', 'pos': (10, 9.5), 'size': (3.5, 2.5), 'color': colors['message'],
+    {'name': 'Messaging &\nCommunication', 'pos': (10, 9.5), 'size': (3.5, 2.5), 'category': 'message',
      'details': ['In-App', 'Threads', 'Notifications']},
     
-    {'name': 'Image\nManagement', 'pos': (14.5, 9.5), 'size': (3.5, 2.5), 'color': colors['image'],
+    {'name': 'Image\nManagement', 'pos': (14.5, 9.5), 'size': (3.5, 2.5), 'category': 'image',
      'details': ['Upload', 'Storage', 'Optimization', 'CDN']},
     
     # Row 3 - Support Features
-    {'name': 'Notifications\nSystem', 'pos': (1, 6), 'size': (3.5, 2.5), 'color': colors['notification'],
+    {'name': 'Notifications\nSystem', 'pos': (1, 6), 'size': (3.5, 2.5), 'category': 'notification',
      'details': ['Email', 'Push', 'SMS', 'Preferences']},
     
-    {'name': 'Admin\nDashboard', 'pos': (5.5, 6), 'size': (3.5, 2.5), 'color': colors['admin'],
+    {'name': 'Admin\nDashboard', 'pos': (5.5, 6), 'size': (3.5, 2.5), 'category': 'admin',
      'details': ['Users', 'Properties', 'Bookings', 'Analytics']},
     
-    {'name': 'Additional\nFeatures', 'pos': (10, 6), 'size': (3.5, 2.5), 'color': colors['additional'],
+    {'name': 'Additional\nFeatures', 'pos': (10, 6), 'size': (3.5, 2.5), 'category': 'additional',
      'details': ['Wishlists', 'Recommendations', 'API', 'Analytics']},
     
     # Security - Bottom
-    {'name': 'Security\nFeatures', 'pos': (14.5, 6), 'size': (3.5, 2.5), 'color': '#C0392B',
+    {'name': 'Security\nFeatures', 'pos': (14.5, 6), 'size': (3.5, 2.5), 'category': 'security',
      'details': ['Encryption', 'HTTPS', 'Auth', 'Validation']},
 ]
 
@@ -82,25 +96,27 @@ for feature in features:
     # Draw main box
     box = FancyBboxPatch((x, y), w, h,
                          boxstyle="round,pad=0.1",
-                         facecolor=feature['color'],
+                         facecolor=colors[feature['category']],
                          edgecolor='black',
                          linewidth=2,
-                         alpha=0.8)
+                         alpha=0.8,
+                         gid=f"feature.{feature['category']}")
     ax.add_patch(box)
     
     # Add title
     ax.text(x + w/2, y + h - 0.4, feature['name'],
             ha='center', va='top', fontsize=11, fontweight='bold',
-            bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.9))
+            bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.9),
+            gid='panel-label')
     
     # Add details
     details_text = '\n'.join([f'• {d}' for d in feature['details']])
     ax.text(x + w/2, y + h/2 - 0.3, details_text,
-            ha='center', va='center', fontsize=8)
+            ha='center', va='center', fontsize=8, gid='label')
 
 # Title
 ax.text(10, 15.5, 'Airbnb Clone Backend - Features & Functionalities',
-        ha='center', va='top', fontsize=18, fontweight='bold')
+        ha='center', va='top', fontsize=18, fontweight='bold', gid='title')
 
 # Draw connections/relationships
 connections = [
@@ -140,7 +156,7 @@ for conn in connections:
     arrow = FancyArrowPatch((conn[0], conn[1]), (conn[2], conn[3]),
                            arrowstyle='->', mutation_scale=20,
                            color='gray', linewidth=1.5, alpha=0.6,
-                           connectionstyle="arc3,rad=0.1")
+                           connectionstyle="arc3,rad=0.1", gid='link')
     ax.add_patch(arrow)
 
 # Add legend
@@ -158,8 +174,12 @@ legend_elements = [
     mpatches.Patch(facecolor=colors['additional'], label='Additional'),
 ]
 
-ax.legend(handles=legend_elements, loc='lower center', bbox_to_anchor=(0.5, 0.02),
-         ncol=6, fontsize=9, framealpha=0.9)
+legend = ax.legend(handles=legend_elements, loc='lower center', bbox_to_anchor=(0.5, 0.02),
+                   ncol=6, fontsize=9, framealpha=0.9)
+tag_legend(legend, ['swatch.auth', 'swatch.property', 'swatch.booking', 'swatch.payment',
+                    'swatch.review', 'swatch.search', 'swatch.message', 'swatch.image',
+                    'swatch.notification', 'swatch.admin', 'swatch.additional'],
+           frame='legend-plain')
 
 # Add technology stack box at the bottom
 tech_box = FancyBboxPatch((1, 0.5), 18, 3,
@@ -167,11 +187,12 @@ tech_box = FancyBboxPatch((1, 0.5), 18, 3,
                          facecolor='#ECF0F1',
                          edgecolor='black',
                          linewidth=2,
-                         alpha=0.9)
+                         alpha=0.9,
+                         gid='panel')
 ax.add_patch(tech_box)
 
 ax.text(10, 3, 'Technology Stack',
-        ha='center', va='top', fontsize=12, fontweight='bold')
+        ha='center', va='top', fontsize=12, fontweight='bold', gid='label')
 
 tech_text = """Backend: Python (Flask/Django) | Node.js (Express) | Ruby on Rails
 Database: PostgreSQL | MySQL | MongoDB | Caching: Redis
@@ -180,15 +201,19 @@ Email: SendGrid | Mailgun | Real-time: WebSockets | Search: Elasticsearch"""
 
 ax.text(10, 2.2, tech_text,
         ha='center', va='top', fontsize=9,
-        bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8))
+        bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8),
+        gid='panel-label')
 
 # Footer
 ax.text(10, 0.1, 'Airbnb Clone Backend Architecture - Feature Overview',
-        ha='center', va='bottom', fontsize=10, style='italic', color='gray')
+        ha='center', va='bottom', fontsize=10, style='italic', color='gray', gid='footer')
 
 plt.tight_layout()
-plt.savefig('features-and-functionalities/backend_features_diagram.png',
-            dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-print("Diagram generated successfully: backend_features_diagram.png")
+if args.lint:
+    sys.exit(1 if lint_figure(fig) else 0)
+for path in render_themes(fig, 'features-and-functionalities/backend_features_diagram.png',
+                          args.themes, dpi=args.dpi, low_memory=args.low_memory,
+                          max_rss_mb=args.max_rss_mb):
+    print(f"Diagram generated successfully: {os.path.basename(path)}")
 plt.close()
 
@@ -0,0 +1,206 @@
+"""
+The Property Booking Process as one table of steps and transitions
+generate_flowchart.py draws it and simulate_booking.py executes it, so the
+documented flowchart and the capacity model cannot drift apart
+"""
+
+from matplotlib.patches import FancyBboxPatch, FancyArrowPatch, Polygon, RegularPolygon
+
+# Define colors
+color_process = '#E8F4F8'  # Light blue for process boxes
+color_decision = '#FFE5B4'  # Peach for decision diamonds
+color_terminal = '#90EE90'  # Light green for start/end
+color_data = '#F0E68C'    # Khaki for data/document steps
+color_abandon = '#F4CCCC'  # Light red for abandoned sessions (simulation only)
+
+# Every step: key -> (kind, x, y, label)
+NODES = {
+    'start': ('terminal', 7, 22.5, 'START'),
+    'search': ('process', 7, 21.5, 'Guest searches\nfor properties'),
+    'results': ('data', 7, 20.5, 'Display search\nresults'),
+    'select': ('process', 7, 19.5, 'Guest selects\nproperty'),
+    'details': ('data', 7, 18.5, 'View property\ndetails'),
+    'logged_in': ('decision', 7, 17.5, 'User\nlogged in?'),
+    'login': ('process', 4, 16.5, 'Login or\nRegister'),
+    'return_property': ('process', 4, 15.5, 'Return to\nproperty page'),
+    'select_dates': ('process', 7, 16.5, 'Select dates\nand guests'),
+    'check_availability': ('process', 7, 15.5, 'Check property\navailability'),
+    'available': ('decision', 7, 14.5, 'Property\navailable?'),
+    'not_available': ('process', 4, 13.5, 'Show not available\nmessage'),
+    'return_search': ('process', 4, 12.5, 'Return to\nsearch'),
+    'calculate_price': ('process', 10, 14.5, 'Calculate total\nprice'),
+    'summary': ('data', 10, 13.5, 'Display booking\nsummary'),
+    'review': ('process', 10, 12.5, 'Guest reviews\nbooking details'),
+    'proceed': ('decision', 10, 11.5, 'Proceed to\npayment?'),
+    'modify': ('process', 7.5, 10.5, 'Modify booking\ndetails'),
+    'enter_payment': ('process', 12.5, 11.5, 'Enter payment\ninformation'),
+    'validate_payment': ('process', 12.5, 10.5, 'Validate payment\ndetails'),
+    'payment_valid': ('decision', 12.5, 9.5, 'Payment\nvalid?'),
+    'payment_error': ('process', 10, 8.5, 'Show payment\nerror'),
+    'process_payment': ('process', 12.5, 8.5, 'Process payment\nwith gateway'),
+    'payment_successful': ('decision', 12.5, 7.5, 'Payment\nsuccessful?'),
+    'payment_failed': ('process', 10, 6.5, 'Payment failed\nhandle error'),
+    'notify_failure': ('process', 10, 5.5, 'Notify guest\nof failure'),
+    'end_failed': ('terminal', 10, 4.5, 'END\n(Booking Failed)'),
+    'create_booking': ('process', 15, 7.5, 'Create booking\nrecord'),
+    'update_availability': ('process', 15, 6.5, 'Update property\navailability'),
+    'save_booking': ('data', 15, 5.5, 'Save booking to\ndatabase'),
+    'send_email': ('process', 15, 4.5, 'Send confirmation\nemail'),
+    'invoice': ('data', 15, 3.5, 'Generate booking\ninvoice'),
+    'notify_host': ('process', 15, 2.5, 'Notify host of\nnew booking'),
+    'set_status': ('process', 15, 1.5, 'Set booking status\nto "Confirmed"'),
+    'display_confirmation': ('process', 15, 0.5, 'Display booking\nconfirmation'),
+    'end_confirmed': ('terminal', 15, -0.5, 'END\n(Booking Confirmed)'),
+    # Not on the documented flowchart: sessions that give up inside a loop
+    'end_abandoned': ('abandon', 6.2, 9.0, 'END\n(Abandoned)'),
+}
+
+# Transitions: (source, target, arrow).  arrow is (x1, y1, x2, y2, label) as
+# drawn on the documented flowchart, or None where the chart stacks the two
+# steps without one (and for the simulation-only abandon edges)
+EDGES = [
+    ('start', 'search', None),
+    ('search', 'results', None),
+    ('results', 'select', None),
+    ('select', 'details', None),
+    ('details', 'logged_in', None),
+    ('logged_in', 'select_dates', None),
+    ('logged_in', 'login', (6.2, 17.5, 4, 17.2, '')),
+    ('login', 'return_property', (4, 16.2, 4, 15.8, '')),
+    ('return_property', 'select_dates', (4, 15.2, 7, 16.8, '')),
+    ('select_dates', 'check_availability', None),
+    ('check_availability', 'available', None),
+    ('available', 'calculate_price', None),
+    ('available', 'not_available', (6.2, 14.5, 4, 14.2, '')),
+    ('not_available', 'return_search', (4, 13.2, 4, 12.8, '')),
+    ('return_search', 'results', (4, 12.2, 7, 20.8, 'Search again')),
+    ('return_search', 'end_abandoned', None),
+    ('calculate_price', 'summary', None),
+    ('summary', 'review', None),
+    ('review', 'proceed', None),
+    ('proceed', 'enter_payment', (10.8, 11.5, 12.5, 11.5, 'Yes')),
+    ('proceed', 'modify', (9.2, 11.5, 8.5, 11.2, '')),
+    ('modify', 'select_dates', (7.5, 10.2, 7, 16.8, 'Back')),
+    ('modify', 'end_abandoned', None),
+    ('enter_payment', 'validate_payment', None),
+    ('validate_payment', 'payment_valid', None),
+    ('payment_valid', 'process_payment', (12.5, 9.2, 12.5, 9.0, '')),
+    ('payment_valid', 'payment_error', (11.7, 9.5, 10.5, 9.2, '')),
+    ('payment_error', 'enter_payment', (10, 8.2, 12.5, 11.2, 'Retry')),
+    ('payment_error', 'end_abandoned', None),
+    ('process_payment', 'payment_successful', None),
+    ('payment_successful', 'create_booking', (13.3, 7.5, 15, 7.5, 'Yes')),
+    ('payment_successful', 'payment_failed', (11.7, 7.5, 10.5, 7.2, '')),
+    ('payment_failed', 'notify_failure', (10, 6.2, 10, 6.0, '')),
+    ('notify_failure', 'end_failed', None),
+    ('create_booking', 'update_availability', None),
+    ('update_availability', 'save_booking', None),
+    ('save_booking', 'send_email', None),
+    ('send_email', 'invoice', None),
+    ('invoice', 'notify_host', None),
+    ('notify_host', 'set_status', None),
+    ('set_status', 'display_confirmation', None),
+    ('display_confirmation', 'end_confirmed', None),
+]
+
+# Steps with two ways out: key -> (probability name, target when it holds).
+# The other edge leaving the step is taken otherwise.
+BRANCHES = {
+    'logged_in': ('logged_in', 'select_dates'),
+    'available': ('available', 'calculate_price'),
+    'return_search': ('search_again', 'results'),
+    'proceed': ('proceed', 'enter_payment'),
+    'modify': ('modify_again', 'select_dates'),
+    'payment_valid': ('payment_valid', 'process_payment'),
+    'payment_error': ('retry_payment', 'enter_payment'),
+    'payment_successful': ('payment_successful', 'create_booking'),
+}
+
+
+def documented(key):
+    """Whether a step appears on the documented flowchart."""
+    return NODES[key][0] != 'abandon'
+
+
+# Helper to draw process/operation (rectangle)
+def draw_process(ax, x, y, label, w=2.5, h=0.8):
+    box = FancyBboxPatch((x-w/2, y-h/2), w, h,
+                        boxstyle="round,pad=0.1",
+                        facecolor=color_process,
+                        edgecolor='#2c5aa0',
+                        linewidth=2, gid='process')
+    ax.add_patch(box)
+    ax.text(x, y, label, ha='center', va='center',
+           fontsize=9, fontweight='bold', wrap=True, gid='label')
+    return box
+
+# Helper to draw decision (diamond)
+def draw_decision(ax, x, y, label, size=0.8):
+    diamond = RegularPolygon((x, y), 4, radius=size,
+                            orientation=0.785398,
+                            facecolor=color_decision,
+                            edgecolor='#FF8C00',
+                            linewidth=2, gid='decision')
+    ax.add_patch(diamond)
+    ax.text(x, y, label, ha='center', va='center',
+           fontsize=8, fontweight='bold', gid='label')
+    return diamond
+
+# Helper to draw terminal (rounded rectangle); abandoned sessions reuse it
+def draw_terminal(ax, x, y, label, w=2.2, h=0.7, abandon=False):
+    box = FancyBboxPatch((x-w/2, y-h/2), w, h,
+                        boxstyle="round,pad=0.15",
+                        facecolor=color_abandon if abandon else color_terminal,
+                        edgecolor='#B22222' if abandon else '#008000',
+                        linewidth=2, gid='abandon' if abandon else 'terminal')
+    ax.add_patch(box)
+    ax.text(x, y, label, ha='center', va='center',
+           fontsize=9, fontweight='bold', gid='label')
+    return box
+
+# Helper to draw data/document (parallelogram)
+def draw_data(ax, x, y, label, w=2.5, h=0.8):
+    points = [
+        (x-w/2+0.2, y-h/2),
+        (x+w/2, y-h/2),
+        (x+w/2-0.2, y+h/2),
+        (x-w/2, y+h/2)
+    ]
+    poly = Polygon(points, closed=True,
+                  facecolor=color_data,
+                  edgecolor='#8B6914',
+                  linewidth=2, gid='data')
+    ax.add_patch(poly)
+    ax.text(x, y, label, ha='center', va='center',
+           fontsize=8, fontweight='bold', gid='label')
+    return poly
+
+# Helper to draw any step from NODES, optionally elsewhere; returns its shape
+def draw_node(ax, key, x=None, y=None):
+    kind, node_x, node_y, label = NODES[key]
+    x = node_x if x is None else x
+    y = node_y if y is None else y
+    if kind == 'process':
+        return draw_process(ax, x, y, label)
+    elif kind == 'decision':
+        return draw_decision(ax, x, y, label)
+    elif kind == 'data':
+        return draw_data(ax, x, y, label)
+    else:
+        return draw_terminal(ax, x, y, label, abandon=kind == 'abandon')
+
+# Helper to draw arrow
+def draw_arrow(ax, x1, y1, x2, y2, label='', offset_x=0, offset_y=0.15):
+    arrow = FancyArrowPatch((x1, y1), (x2, y2),
+                           arrowstyle='->', mutation_scale=20,
+                           color='#333333', linewidth=1.8, gid='flow')
+    ax.add_patch(arrow)
+
+    if label:
+        mid_x = (x1 + x2) / 2 + offset_x
+        mid_y = (y1 + y2) / 2 + offset_y
+        ax.text(mid_x, mid_y, label, ha='center', va='center',
+               fontsize=7, style='italic',
+               bbox=dict(boxstyle='round,pad=0.2',
+                        facecolor='white', alpha=0.9,
+                        edgecolor='none'), gid='flow-label')
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Simulate the Property Booking Process as an executable state machine
+Pushes synthetic sessions through the flowchart and annotates every edge
+with its throughput (traversals per session) and drop-off (the share of the
+sessions taking it that end failed or abandoned); --lint checks the
+annotated chart's geometry instead of rendering it
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.patches import FancyArrowPatch
+from matplotlib.path import Path
+import matplotlib.patches as mpatches
+
+from booking_flow import (BRANCHES, EDGES, NODES, color_abandon, color_data, color_decision,
+                          color_process, color_terminal, draw_node)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from diagram_tools import tag_legend
+from diagram_tools.lint import lint_figure
+
+# ===== STATE MACHINE =====
+
+# Steps, transitions and branch points come from booking_flow.py, the same
+# table generate_flowchart.py draws
+
+# Branch probabilities (override with --prob name=value)
+DEFAULT_PROBABILITIES = {
+    'logged_in': 0.60,
+    'available': 0.70,
+    'search_again': 0.50,
+    'proceed': 0.75,
+    'modify_again': 0.60,
+    'payment_valid': 0.90,
+    'retry_payment': 0.70,
+    'payment_successful': 0.95,
+}
+
+OUTCOMES = ('end_confirmed', 'end_failed', 'end_abandoned')
+# Outcomes that count as a drop-off
+LOST = ('end_failed', 'end_abandoned')
+
+
+def build_transitions(probabilities):
+    """Return state keys plus first/second successor and P(first) arrays."""
+    keys = list(NODES)
+    index = {key: i for i, key in enumerate(keys)}
+    n = len(keys)
+
+    # Steps without a way out loop onto themselves and are never stepped
+    first = np.arange(n)
+    second = np.arange(n)
+    p_first = np.ones(n)
+    terminal = np.ones(n, dtype=bool)
+
+    outgoing = {}
+    for src, dst, _arrow in EDGES:
+        outgoing.setdefault(src, []).append(dst)
+    for src, targets in outgoing.items():
+        i = index[src]
+        terminal[i] = False
+        if src in BRANCHES:
+            name, taken = BRANCHES[src]
+            p = probabilities[name]
+            if not 0.0 <= p <= 1.0:
+                raise ValueError(f"probability {name!r} must be within [0, 1], got {p}")
+            otherwise, = [dst for dst in targets if dst != taken]
+            first[i], second[i], p_first[i] = index[taken], index[otherwise], p
+        else:
+            first[i] = second[i] = index[targets[0]]
+
+    return keys, first, second, p_first, terminal
+
+
+def _mix(z):
+    """SplitMix64 finalizer: scrambles uint64 counters into random bits."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def uniforms(key, sessions, step):
+    """Uniform [0, 1) draws for ``sessions`` (global indices) at ``step``.
+
+    Each draw is a hash of (key, session, step) rather than the next number
+    of a stream, so a session sees the same draws whichever chunk it is
+    simulated in.
+    """
+    golden = 0x9E3779B97F4A7C15
+    z = _mix(key + sessions.astype(np.uint64) * np.uint64(golden))
+    z = _mix(z + np.uint64((step + 1) * golden % 2**64))
+    return (z >> np.uint64(11)) * 2.0 ** -53
+
+
+def simulate(n_sessions, probabilities=None, seed=None,
+             chunk_size=1_000_000, max_steps=500):
+    """Run sessions through the flow and count every edge traversal.
+
+    Sessions are advanced one step at a time as a NumPy array of state
+    indices, in chunks of ``chunk_size`` so memory stays flat regardless of
+    ``n_sessions``; the draws do not depend on the chunking (see uniforms).  Each session also keeps a bit mask of the edges it has
+    taken, so every edge can be credited with the outcome of the sessions
+    that used it.  Returns a dict with the state keys, an S x S traversal
+    count matrix, S x S counts of the sessions that took each edge and of
+    those that ended in a LOST outcome, final-state counts and the number
+    of sessions cut off by ``max_steps``.
+    """
+    if n_sessions < 1:
+        raise ValueError(f"n_sessions must be at least 1, got {n_sessions}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    probs = dict(DEFAULT_PROBABILITIES)
+    probs.update(probabilities or {})
+    keys, first, second, p_first, terminal = build_transitions(probs)
+    n_states = len(keys)
+    start = keys.index('start')
+    lost = [keys.index(key) for key in LOST]
+    key = np.uint64(np.random.default_rng(seed).integers(2**63))
+
+    # One bit per edge of the flow in a session's mask of edges taken
+    if len(EDGES) > 64:
+        raise ValueError(f"at most 64 edges can be tracked, the flow has {len(EDGES)}")
+    pairs = [(keys.index(src), keys.index(dst)) for src, dst, _arrow in EDGES]
+    edge_bit = np.zeros((n_states, n_states), dtype=np.uint64)
+    for bit, (i, j) in enumerate(pairs):
+        edge_bit[i, j] = bit
+
+    traversals = np.zeros(n_states * n_states, dtype=np.int64)
+    edge_sessions = np.zeros((n_states, n_states), dtype=np.int64)
+    edge_lost = np.zeros((n_states, n_states), dtype=np.int64)
+    finals = np.zeros(n_states, dtype=np.int64)
+    truncated = 0
+
+    for offset in range(0, n_sessions, chunk_size):
+        size = min(chunk_size, n_sessions - offset)
+        state = np.full(size, start, dtype=np.intp)
+        used = np.zeros(size, dtype=np.uint64)
+        active = np.arange(size)
+
+        for step in range(max_steps):
+            current = state[active]
+            taken = uniforms(key, offset + active, step) < p_first[current]
+            nxt = np.where(taken, first[current], second[current])
+            traversals += np.bincount(current * n_states + nxt,
+                                      minlength=n_states * n_states)
+            used[active] |= np.left_shift(np.uint64(1), edge_bit[current, nxt])
+            state[active] = nxt
+            active = active[~terminal[nxt]]
+            if active.size == 0:
+                break
+
+        truncated += active.size
+        finals += np.bincount(state, minlength=n_states)
+        ended_lost = np.isin(state, lost)
+        for bit, (i, j) in enumerate(pairs):
+            took = (used >> np.uint64(bit)) & np.uint64(1) == 1
+            edge_sessions[i, j] += np.count_nonzero(took)
+            edge_lost[i, j] += np.count_nonzero(took & ended_lost)
+
+    return {
+        'keys': keys,
+        'sessions': n_sessions,
+        'traversals': traversals.reshape(n_states, n_states),
+        'edge_sessions': edge_sessions,
+        'edge_lost': edge_lost,
+        'finals': finals,
+        'truncated': truncated,
+        'probabilities': probs,
+    }
+
+
+def edge_stats(result):
+    """Yield (src, dst, traversals, throughput, drop_off) for every edge used.
+
+    Throughput is traversals per session (above 1 on loops); drop-off is the
+    share of the sessions that took the edge and ended in a LOST outcome.
+    """
+    keys = result['keys']
+    counts = result['traversals']
+    sessions = result['sessions']
+    for i, j in zip(*np.nonzero(counts)):
+        throughput = counts[i, j] / sessions
+        drop_off = result['edge_lost'][i, j] / result['edge_sessions'][i, j]
+        yield keys[i], keys[j], int(counts[i, j]), throughput, drop_off
+
+
+def print_report(result, sessions_per_hour=None):
+    keys = result['keys']
+    sessions = result['sessions']
+    finals = result['finals']
+
+    print(f"Simulated {sessions:,} sessions")
+    for outcome in OUTCOMES:
+        share = finals[keys.index(outcome)] / sessions
+        print(f"  {NODES[outcome][3].replace(chr(10), ' '):<24} {share:8.2%}")
+    if result['truncated']:
+        print(f"  {'Cut off at max steps':<24} {result['truncated'] / sessions:8.2%}")
+
+    # Visits per session drive the capacity needed behind each step
+    visits = result['traversals'].sum(axis=0) / sessions
+    print("\nVisits per session" + (" / requests per hour" if sessions_per_hour else ""))
+    for key in keys:
+        if key == 'start' or NODES[key][0] in ('terminal', 'abandon'):
+            continue
+        line = f"  {NODES[key][3].replace(chr(10), ' '):<36} {visits[keys.index(key)]:6.3f}"
+        if sessions_per_hour:
+            line += f"  {visits[keys.index(key)] * sessions_per_hour:>14,.0f}"
+        print(line)
+
+
+# ===== RENDERING =====
+
+# The chart packs its steps edge to edge; spreading them opens a gap for
+# every edge and its label.  Arrows keep their ends at the same offset from
+# their steps as on the documented chart.
+SPREAD_X, SPREAD_Y = 1.3, 1.6
+
+# The documented chart draws its loop-backs straight across the steps
+# between their ends; here they leave and enter their steps from the side
+# and run up a lane between the columns.  Each loop: (lane x on the chart,
+# how far below the target's center it enters, side of the lane its label
+# goes on)
+LOOPS = {
+    ('return_search', 'results'): (2.3, 0.0, 'left'),
+    ('modify', 'select_dates'): (8.6, 0.0, 'right'),
+    ('payment_error', 'enter_payment'): (11.25, 0.2, 'right'),
+}
+
+# Edge labels moved off the middle of their arrows, where that is crowded
+# (x, y in the units of the spread chart)
+LABEL_SHIFT = {
+    ('return_property', 'select_dates'): (0.4, -0.1),
+    ('modify', 'select_dates'): (0.0, -4.0),
+    ('payment_valid', 'payment_error'): (-1.1, 0.0),
+    ('payment_error', 'enter_payment'): (0.0, 0.15),
+}
+
+
+def place(x, y):
+    return x * SPREAD_X, y * SPREAD_Y
+
+
+def anchored(key, x, y):
+    """A point given on the documented chart, kept at the same offset from
+    step ``key`` once the steps are spread."""
+    _, node_x, node_y, _ = NODES[key]
+    spread_x, spread_y = place(node_x, node_y)
+    return spread_x + x - node_x, spread_y + y - node_y
+
+
+def edge_label(throughput, drop_off, name=''):
+    label = f'{throughput:.2f}/session\ndrop {drop_off:.1%}'
+    return f'{name}: {label}' if name else label
+
+
+def _midpoint(arrow):
+    """Half-way along the drawn shaft of ``arrow``, and its direction there."""
+    shaft = arrow.get_path().to_polygons(closed_only=False)[0]
+    steps = np.hypot(*np.diff(shaft, axis=0).T)
+    at = min(np.searchsorted(np.cumsum(steps), steps.sum() / 2), len(steps) - 1)
+    direction = shaft[at + 1] - shaft[at]
+    return shaft[at] + direction / 2, direction
+
+
+def _side(ax, shape, x):
+    """The point on the left or right side of ``shape`` facing chart x."""
+    box = ax.transData.inverted().transform_bbox(shape.get_extents())
+    return box.x1 if x > box.x1 else box.x0
+
+
+# Helper to draw one annotated edge, above the steps it joins
+def draw_edge(ax, src, dst, shapes, throughput, drop_off):
+    style = dict(arrowstyle='->', mutation_scale=18, color='#333333',
+                 linewidth=0.8 + 3.2 * min(throughput, 1.0), gid='flow')
+    documented = next(edge for edge in EDGES if edge[:2] == (src, dst))[2]
+    name = documented[4] if documented else ''
+    side = 'right'
+    if (src, dst) in LOOPS:
+        lane, below, side = LOOPS[src, dst]
+        lane, _ = place(lane, 0)
+        (_, y1), (_, y2) = place(0, NODES[src][2]), place(0, NODES[dst][2] - below)
+        route = [(_side(ax, shapes[src], lane), y1), (lane, y1), (lane, y2),
+                 (_side(ax, shapes[dst], lane), y2)]
+        arrow = FancyArrowPatch(path=Path(route), **style)
+    else:
+        if documented:
+            start = anchored(src, *documented[0:2])
+            end = anchored(dst, *documented[2:4])
+        else:
+            start, end = place(*NODES[src][1:3]), place(*NODES[dst][1:3])
+        # Both ends are clipped to the outlines of their steps
+        arrow = FancyArrowPatch(start, end, patchA=shapes[src], patchB=shapes[dst],
+                                shrinkA=2, shrinkB=2, **style)
+    ax.add_patch(arrow)
+
+    # The label sits beside the middle of the arrow: right of steep ones
+    # (or on the loop's side), above flat ones
+    (mid_x, mid_y), (dx, dy) = _midpoint(arrow)
+    shift_x, shift_y = LABEL_SHIFT.get((src, dst), (0, 0))
+    if abs(dy) >= abs(dx):
+        beside = 0.12 if side == 'right' else -0.12
+        spot = dict(x=mid_x + beside + shift_x, y=mid_y + shift_y,
+                    ha='left' if side == 'right' else 'right', va='center')
+    else:
+        spot = dict(x=mid_x + shift_x, y=mid_y + 0.1 + shift_y, ha='center', va='bottom')
+    ax.text(s=edge_label(throughput, drop_off, name), fontsize=6.5, style='italic',
+            bbox=dict(boxstyle='round,pad=0.2', facecolor='white',
+                      alpha=0.9, edgecolor='none'), gid='flow-label', **spot)
+
+
+def render(result):
+    """Draw the annotated flowchart and return its figure."""
+    keys = result['keys']
+    sessions = result['sessions']
+
+    fig, ax = plt.subplots(1, 1, figsize=(22, 34))
+    ax.set_xlim(place(0.5, 0)[0], place(17, 0)[0])
+    ax.set_ylim(place(0, -1.2)[1], place(0, 24)[1])
+    ax.axis('off')
+
+    ax.text(*place(9, 23.6), 'Property Booking Process - Simulated Throughput',
+            ha='center', va='top', fontsize=18, fontweight='bold', gid='title')
+
+    shapes = {key: draw_node(ax, key, *place(*NODES[key][1:3])) for key in NODES}
+    for src, dst, _count, throughput, drop_off in edge_stats(result):
+        draw_edge(ax, src, dst, shapes, throughput, drop_off)
+
+    finals = result['finals']
+    summary = '\n'.join(
+        f"{NODES[o][3].replace(chr(10), ' ')}: {finals[keys.index(o)] / sessions:.2%}"
+        for o in OUTCOMES)
+    ax.text(*place(1.0, 5.5), f'{sessions:,} sessions\n{summary}', ha='left', va='top',
+            fontsize=10, bbox=dict(boxstyle='round,pad=0.5', facecolor='white',
+                                   edgecolor='black'), gid='footer')
+
+    legend_elements = [
+        mpatches.Patch(facecolor=color_terminal, edgecolor='#008000',
+                       label='Start/End', linewidth=2),
+        mpatches.Patch(facecolor=color_process, edgecolor='#2c5aa0',
+                       label='Process', linewidth=2),
+        mpatches.Patch(facecolor=color_decision, edgecolor='#FF8C00',
+                       label='Decision', linewidth=2),
+        mpatches.Patch(facecolor=color_data, edgecolor='#8B6914',
+                       label='Data/Document', linewidth=2),
+        mpatches.Patch(facecolor=color_abandon, edgecolor='#B22222',
+                       label='Abandoned', linewidth=2),
+    ]
+    legend = ax.legend(handles=legend_elements, loc='upper left',
+                       bbox_to_anchor=(0.01, 0.97), fontsize=10,
+                       framealpha=0.9, edgecolor='black', title='Flowchart Symbols')
+    tag_legend(legend, ['terminal', 'process', 'decision', 'data', 'abandon'])
+
+    ax.text(*place(9, -0.95), 'Edge labels: traversals per session, and the share of the '
+            'sessions taking the edge that end failed or abandoned',
+            ha='center', va='top', fontsize=9, style='italic', color='gray', gid='footer')
+    return fig
+
+
+def parse_probability(text):
+    name, _, value = text.partition('=')
+    if name not in DEFAULT_PROBABILITIES or not value:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=VALUE with NAME in {', '.join(DEFAULT_PROBABILITIES)}")
+    try:
+        p = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{name}: {value!r} is not a number") from None
+    if not 0.0 <= p <= 1.0:
+        raise argparse.ArgumentTypeError(f"{name}: probability must be within [0, 1], got {p}")
+    return name, p
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--sessions', type=positive_int, default=1_000_000,
+                        help='number of synthetic sessions (default: 1,000,000)')
+    parser.add_argument('--prob', type=parse_probability, action='append',
+                        default=[], metavar='NAME=VALUE',
+                        help='override a branch probability (repeatable)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=positive_int, default=1_000_000,
+                        help='sessions simulated per NumPy batch')
+    parser.add_argument('--sessions-per-hour', type=float, default=None,
+                        help='peak arrival rate used to size each step')
+    parser.add_argument('-o', '--output', default='flowcharts/booking-simulation.png',
+                        help='annotated flowchart to write ("-" to skip)')
+    parser.add_argument('--lint', action='store_true',
+                        help='check the annotated chart geometry, print findings as JSON lines, skip rendering')
+    args = parser.parse_args()
+
+    result = simulate(args.sessions, dict(args.prob), seed=args.seed,
+                      chunk_size=args.chunk_size)
+    print_report(result, args.sessions_per_hour)
+    if args.lint:
+        sys.exit(1 if lint_figure(render(result)) else 0)
+    if args.output != '-':
+        fig = render(result)
+        fig.savefig(args.output, dpi=150, bbox_inches='tight', facecolor='white',
+                    edgecolor='none')
+        plt.close(fig)
+        print(f"\nAnnotated flowchart generated successfully: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
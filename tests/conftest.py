@@ -0,0 +1,47 @@
+"""
+Shared fixtures: the generator scripts, run in-process with render_themes
+captured, so tests get the laid-out figure without overwriting the
+committed PNGs
+"""
+
+import os
+import runpy
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pytest
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO)
+import diagram_tools
+
+SCRIPTS = [
+    'data-flow-diagram/generate_dfd.py',
+    'features-and-functionalities/generate_diagram.py',
+    'flowcharts/generate_flowchart.py',
+    'use-case-diagram/use_case_diagram.py',
+]
+
+
+@pytest.fixture(params=SCRIPTS)
+def script(request):
+    return request.param
+
+
+@pytest.fixture
+def script_figure(monkeypatch):
+    """Run a generator script and return the figure it would render."""
+    def run(script):
+        path = os.path.join(REPO, script)
+        captured = []
+        monkeypatch.setattr(diagram_tools, 'render_themes',
+                            lambda fig, *args, **kwargs: captured.append(fig) or [])
+        monkeypatch.setattr(sys, 'argv', [path])
+        monkeypatch.syspath_prepend(os.path.dirname(path))
+        runpy.run_path(path, run_name='__main__')
+        return captured[0]
+
+    yield run
+    plt.close('all')
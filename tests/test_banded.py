@@ -0,0 +1,81 @@
+"""
+Banded rendering must produce the same pixels as a normal savefig
+Every generator script's figure (see conftest.py) is saved both ways at a
+low dpi with bands small enough to cut through labels
+"""
+
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.image as mpimg
+import numpy as np
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.figure import Figure
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO)
+from diagram_tools import output_region, save_banded
+from diagram_tools.banded import _wrapped_text
+from diagram_tools.importer import draw_graph, import_graph
+
+DPI = 50
+BAND_ROWS = 37
+
+# The two renders place every band at the same whole-pixel offset, but
+# reach it through different float arithmetic: antialiased edges may differ
+# by a few shades, and an edge that lies exactly on a pixel boundary may be
+# snapped to either side of it.  Those ties move a few pixels by one row or
+# column; an offset band would move hundreds.
+SHADE = 10 / 255
+MAX_TIES = 64
+
+
+def assert_banded_matches(fig, tmp_path):
+    region = output_region(fig, DPI)
+    fig.savefig(tmp_path / 'full.png', dpi=DPI, bbox_inches=region,
+                facecolor='white', edgecolor='none')
+    bands = save_banded(fig, tmp_path / 'banded.png', dpi=DPI, band_rows=BAND_ROWS)
+    assert bands > 1
+
+    full = mpimg.imread(tmp_path / 'full.png')
+    banded = mpimg.imread(tmp_path / 'banded.png')
+    assert banded.shape == full.shape
+    differing = np.abs(banded - full).max(axis=-1) > SHADE
+    assert differing.sum() <= MAX_TIES, f"{differing.sum()} pixels differ"
+    # Each tie is its neighbour in the other render
+    nearest = np.min([np.abs(banded - np.roll(full, (dy, dx), axis=(0, 1))).max(axis=-1)
+                      for dy in (-1, 0, 1) for dx in (-1, 0, 1)], axis=0)
+    assert not (nearest[differing] > SHADE).any()
+
+
+def test_script_banded_matches_savefig(script_figure, script, tmp_path):
+    assert_banded_matches(script_figure(script), tmp_path)
+
+
+def test_imported_graph_banded_matches_savefig(tmp_path):
+    graph = import_graph(os.path.join(REPO, 'tests', 'fixtures', 'checkout.dot'))
+    assert_banded_matches(draw_graph(graph, title='Checkout'), tmp_path)
+
+
+def test_banded_restores_wrapped_text(script_figure, tmp_path):
+    fig = script_figure('flowcharts/generate_flowchart.py')
+    texts = [text for text in fig.findobj(matplotlib.text.Text) if text.get_wrap()]
+    before = [text.get_text() for text in texts]
+    assert texts
+    save_banded(fig, tmp_path / 'banded.png', dpi=DPI, band_rows=BAND_ROWS)
+    assert [text.get_text() for text in texts] == before
+    assert all(text.get_wrap() for text in texts)
+
+
+def test_wrapping_hook():
+    # save_banded breaks wrapped labels through matplotlib internals
+    # (Text._get_wrapped_text, Text._renderer); if they change, banded
+    # renders fall back to wrapping per band and this test says why
+    fig = Figure(figsize=(3, 2))
+    text = fig.text(0.1, 0.5, 'Guest selects dates and the number of guests', wrap=True)
+    broken = _wrapped_text(text, RendererAgg(1, 1, fig.dpi))
+    assert broken is not None, "matplotlib's private text wrapping hook is gone"
+    assert '\n' in broken and broken.split() == text.get_text().split(), (
+        f"matplotlib's private text wrapping hook changed: {broken!r}")
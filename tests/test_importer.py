@@ -0,0 +1,80 @@
+"""
+DOT and Mermaid import: chunk boundaries must not change what is parsed,
+Mermaid class lines pick shapes, and undirected edges lose their heads
+"""
+
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import pytest
+from matplotlib.patches import FancyArrowPatch
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO)
+from diagram_tools.importer import (KINDS, build_graph, dot_events, draw_graph,
+                                    mermaid_events)
+
+FIXTURE = os.path.join(REPO, 'tests', 'fixtures', 'checkout.dot')
+
+
+def chunked(text, size):
+    return [text[pos:pos + size] for pos in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_dot_events_do_not_depend_on_chunk_size(size):
+    with open(FIXTURE, encoding='utf-8') as handle:
+        text = handle.read()
+    expected = list(dot_events([text]))
+    assert list(dot_events(chunked(text, size))) == expected
+
+
+def test_numerals_cut_after_their_point():
+    events = list(dot_events(['digraph { a [width=.', '5]; b [width=-', '.', '5e1] }']))
+    assert events == list(dot_events(['digraph { a [width=.5]; b [width=-.5e1] }']))
+
+
+def test_long_html_label_is_scanned_once():
+    label = '<' + ' '.join(f'<B>step {i}</B><BR/>' for i in range(5_000)) + '>'
+    text = f'digraph {{ a [label={label}]; a -> b }}'
+    started = time.perf_counter()
+    events = list(dot_events(chunked(text, 64)))
+    # Rescanning the label from its start on each of ~2,000 chunks took seconds
+    assert time.perf_counter() - started < 1
+    assert events == list(dot_events([text]))
+
+
+def kinds(graph):
+    return {name: KINDS[graph.kinds[index]] for name, index in graph.index.items()}
+
+
+def test_mermaid_class_lines_pick_kinds():
+    graph = build_graph(mermaid_events([
+        'flowchart TB',
+        '    class A,B store',
+        '    A[Bookings] --> B[Payments] --> C{Paid?}',
+        '    class C terminal; class A highlighted',
+    ]))
+    assert kinds(graph) == {'A': 'store', 'B': 'store', 'C': 'terminal'}
+
+
+def arrowstyles(graph):
+    fig = draw_graph(graph)
+    return [patch.get_arrowstyle().arrow for patch in fig.axes[0].patches
+            if isinstance(patch, FancyArrowPatch)]
+
+
+def test_undirected_edges_are_drawn_without_heads():
+    dot = build_graph(dot_events(['graph { a -- b -- c; c -- d [dir=forward] }']))
+    assert arrowstyles(dot) == ['-', '-', '->']
+
+    mermaid = build_graph(mermaid_events([
+        'flowchart LR',
+        '    A --- B --> C',
+        '    C -- label --- D -. dotted .-> E',
+        '    E === F --o G',
+    ]))
+    assert arrowstyles(mermaid) == ['-', '->', '-', '->', '-', '->']
@@ -0,0 +1,146 @@
+"""
+The linter's bulk extents must match what matplotlib measures, and a label
+crossed by an arrow must be reported unless the arrow is the one it labels
+"""
+
+import io
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.patches import (Ellipse, FancyArrowPatch, FancyBboxPatch, Polygon,
+                                Rectangle, RegularPolygon)
+from matplotlib.text import Text
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO)
+from diagram_tools.lint import (_arc_segments, _bench_figure, _flow_segments, _is_plain_arc,
+                                collect_elements, lint_elements, lint_figure)
+
+
+@pytest.fixture
+def ax():
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.set_xlim(0, 16)
+    ax.set_ylim(0, 12)
+    yield ax
+    plt.close(fig)
+
+
+def rules(ax):
+    return [finding['rule'] for finding in lint_elements(collect_elements(ax.figure))]
+
+
+def test_extents_match_window_extents(ax):
+    artists = [
+        FancyBboxPatch((1, 1), 2.5, 0.8, boxstyle='round,pad=0.1', gid='process'),
+        FancyBboxPatch((5, 1), 2.2, 0.7, boxstyle='square,pad=0.15', gid='terminal'),
+        Rectangle((9, 1), 2, 1, angle=30, gid='store'),
+        Ellipse((2, 5), 3, 1.5, gid='usecase'),
+        Polygon([(5, 4), (7.5, 4), (7.3, 4.8), (4.8, 4.8)], gid='data'),
+        RegularPolygon((10, 5), 4, radius=0.8, orientation=0.785398, gid='decision'),
+    ]
+    for artist in artists:
+        ax.add_patch(artist)
+    # Repeated strings share one measurement; the others are measured alone
+    artists += [ax.text(2, 1.4, 'Guest\nsearches', ha='center', va='center', gid='label'),
+                ax.text(6, 1.4, 'Guest\nsearches', ha='center', va='center', gid='label'),
+                # Composed from the lines measured above
+                ax.text(2, 3, 'Guest\nGuest\nsearches', ha='center', va='center', gid='label'),
+                ax.text(6, 3, 'searches\n\nGuest', ha='center', va='center', gid='label'),
+                ax.text(9, 3, 'Host\nsearches', ha='left', va='top', gid='label'),
+                ax.text(9, 4, 'Host', ha='left', va='top', gid='label'),
+                ax.text(9, 6, 'searches\nHost', ha='left', va='top', gid='label'),
+                ax.text(12, 9, 'gyp\nHost', ha='right', va='bottom', linespacing=1.5,
+                        gid='label'),
+                ax.text(12, 10, 'Host\ngyp', ha='right', va='bottom', linespacing=1.5,
+                        gid='label'),
+                ax.text(12, 11, 'gyp\nHost\nÅgyp', ha='right', va='bottom', linespacing=1.5,
+                        gid='label'),
+                ax.text(14, 9, '$x^2$\nHost', ha='right', va='bottom', linespacing=1.5,
+                        gid='label'),
+                ax.text(2, 5, 'Book', fontsize=12, gid='label'),
+                ax.text(10, 8, 'Yes', rotation=45, style='italic', gid='flow-label'),
+                ax.text(5, 9, 'Wrapped label text', wrap=True, gid='label')]
+
+    renderer = RendererAgg(1, 1, ax.figure.dpi)
+    to_data = ax.transData.inverted()
+    expected = [to_data.transform(artist.get_window_extent(renderer).get_points()).ravel()
+                for artist in artists]
+    np.testing.assert_allclose(collect_elements(ax.figure).boxes, expected, atol=1e-6)
+
+
+def test_label_crossed_by_another_arrow(ax):
+    ax.add_patch(FancyArrowPatch((2, 2), (2, 10), arrowstyle='->', mutation_scale=20,
+                                 gid='flow'))
+    ax.text(2.5, 6, 'Yes', ha='center', va='center', gid='flow-label')
+    assert rules(ax) == []
+
+    ax.add_patch(FancyArrowPatch((1, 6), (5, 6), arrowstyle='->', mutation_scale=20,
+                                 gid='flow'))
+    assert rules(ax) == ['label-over-flow']
+
+
+def test_curved_arrow_passing_a_label(ax):
+    ax.text(8, 6, 'Payment', ha='center', va='center', gid='label')
+    # The straight line from A to B would miss the label; the arc crosses it
+    ax.add_patch(FancyArrowPatch((4, 8), (12, 8), connectionstyle='arc3,rad=0.5',
+                                 arrowstyle='->', gid='flow'))
+    assert rules(ax) == ['label-over-flow']
+
+
+def test_arrow_head_over_a_label(ax):
+    ax.text(8.85, 4.9, 'Reviews', ha='center', va='center', gid='label')
+    # The line passes beside the label, its head does not
+    ax.add_patch(FancyArrowPatch((8, 2), (8, 5.6), arrowstyle='->', mutation_scale=60,
+                                 gid='flow'))
+    assert rules(ax) == ['label-over-flow']
+
+
+def bounds(segments):
+    xs, ys = segments[:, [0, 2]], segments[:, [1, 3]]
+    return [xs.min(), ys.min(), xs.max(), ys.max()]
+
+
+@pytest.mark.parametrize('rad', [0.0, 0.5, -0.3])
+def test_bulk_arcs_follow_the_drawn_path(ax, rad):
+    # Arc3 arrows are evaluated in bulk from FancyArrowPatch._posA_posB, a
+    # matplotlib internal; without it they are flattened one by one
+    arrow = FancyArrowPatch((4, 8), (12, 5), connectionstyle=f'arc3,rad={rad}',
+                            arrowstyle='->', mutation_scale=20, gid='flow')
+    ax.add_patch(arrow)
+    assert _is_plain_arc(arrow), "FancyArrowPatch._posA_posB changed; arcs are not linted in bulk"
+    to_data = ax.transData.inverted()
+    bulk = _arc_segments([arrow], to_data, ax.figure.dpi)[0]
+    np.testing.assert_allclose(bounds(bulk), bounds(_flow_segments(arrow, to_data)), atol=0.03)
+
+
+def test_shared_lines_are_measured_once(monkeypatch):
+    fig = _bench_figure(5_000)
+    calls = []
+    measure = Text.get_window_extent
+    monkeypatch.setattr(Text, 'get_window_extent',
+                        lambda text, *args, **kwargs: calls.append(text.get_text())
+                        or measure(text, *args, **kwargs))
+    collect_elements(fig)
+    # Hundreds of distinct labels, all composed from the first two-line label
+    # and the one-line 'Yes' once matplotlib has confirmed each layout
+    assert len(calls) == 2, calls
+
+
+def test_bench_stays_fast():
+    # 50,000 nodes and labels lint in well under a second (--bench); a tenth
+    # of them gets a quarter of a second so that slow machines do not flake
+    fig = _bench_figure(5_000)
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        lint_figure(fig, stream=io.StringIO())
+        timings.append(time.perf_counter() - started)
+    assert min(timings) < 0.25
@@ -0,0 +1,116 @@
+"""
+The booking simulation must reproduce the flowchart's absorbing Markov
+chain, whatever its batching, and reject probabilities outside [0, 1]
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(REPO, 'flowcharts'))
+sys.path.insert(0, REPO)
+from diagram_tools.lint import lint_figure
+from simulate_booking import (DEFAULT_PROBABILITIES, OUTCOMES, build_transitions,
+                              edge_stats, parse_probability, render, simulate)
+
+SESSIONS = 200_000
+# Five standard errors of a share estimated from SESSIONS sessions
+TOLERANCE = 5 * np.sqrt(0.25 / SESSIONS)
+
+
+def absorption(probabilities):
+    """Exact outcome shares: absorption probabilities of the chain from 'start'."""
+    keys, first, second, p_first, terminal = build_transitions(probabilities)
+    n = len(keys)
+    moves = np.zeros((n, n))
+    np.add.at(moves, (np.arange(n), first), p_first)
+    np.add.at(moves, (np.arange(n), second), 1 - p_first)
+    moving = np.flatnonzero(~terminal)
+    # B = (I - Q)^-1 R over the transient steps
+    reach = np.linalg.solve(np.eye(len(moving)) - moves[np.ix_(moving, moving)],
+                            moves[np.ix_(moving, np.flatnonzero(terminal))])
+    ends = [keys[i] for i in np.flatnonzero(terminal)]
+    start = reach[list(moving).index(keys.index('start'))]
+    return {outcome: start[ends.index(outcome)] for outcome in OUTCOMES}
+
+
+def shares(result):
+    keys = result['keys']
+    return {outcome: result['finals'][keys.index(outcome)] / result['sessions']
+            for outcome in OUTCOMES}
+
+
+def traversals(result, src, dst):
+    keys = result['keys']
+    return result['traversals'][keys.index(src), keys.index(dst)]
+
+
+@pytest.mark.parametrize('overrides', [{}, {'available': 0.3, 'retry_payment': 0.95}])
+def test_outcome_shares_match_the_markov_chain(overrides):
+    probabilities = {**DEFAULT_PROBABILITIES, **overrides}
+    result = simulate(SESSIONS, overrides, seed=7)
+    assert result['truncated'] == 0
+    simulated, exact = shares(result), absorption(probabilities)
+    for outcome in OUTCOMES:
+        assert simulated[outcome] == pytest.approx(exact[outcome], abs=TOLERANCE)
+
+
+def test_results_do_not_depend_on_chunk_size():
+    whole = simulate(20_000, seed=3)
+    for chunk_size in (1, 999, 7_000):
+        chunked = simulate(20_000, seed=3, chunk_size=chunk_size)
+        for name in ('traversals', 'edge_sessions', 'edge_lost', 'finals'):
+            np.testing.assert_array_equal(chunked[name], whole[name])
+
+
+def test_certain_branches_take_one_way():
+    always = simulate(5_000, {'logged_in': 1.0, 'payment_valid': 0.0}, seed=1)
+    assert traversals(always, 'logged_in', 'login') == 0
+    assert traversals(always, 'logged_in', 'select_dates') > 0
+    assert traversals(always, 'payment_valid', 'process_payment') == 0
+    assert traversals(always, 'payment_valid', 'payment_error') > 0
+
+
+def test_drop_off_follows_sessions_to_their_outcome():
+    result = simulate(20_000, seed=2)
+    stats = {(src, dst): drop_off
+             for src, dst, _count, _throughput, drop_off in edge_stats(result)}
+    # Every failed payment ends failed; every created booking is confirmed
+    assert stats['payment_failed', 'notify_failure'] == 1.0
+    assert stats['create_booking', 'update_availability'] == 0.0
+    lost = 1 - shares(result)['end_confirmed']
+    assert stats['start', 'search'] == pytest.approx(lost)
+
+
+@pytest.mark.parametrize('p', [-0.1, 1.5, float('nan')])
+def test_build_transitions_rejects_bad_probabilities(p):
+    with pytest.raises(ValueError, match='within'):
+        build_transitions({**DEFAULT_PROBABILITIES, 'proceed': p})
+
+
+@pytest.mark.parametrize('text', ['proceed', 'proceed=', 'bogus=0.5', 'proceed=often',
+                                  'proceed=1.2', 'proceed=-0.5'])
+def test_parse_probability_rejects_bad_input(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_probability(text)
+
+
+def test_parse_probability():
+    assert parse_probability('proceed=0.8') == ('proceed', 0.8)
+
+
+def test_annotated_chart_lints_clean():
+    fig = render(simulate(20_000, seed=0))
+    findings = io.StringIO()
+    try:
+        assert lint_figure(fig, stream=findings) == 0, findings.getvalue()
+    finally:
+        plt.close(fig)
@@ -0,0 +1,70 @@
+"""
+Theme colors must keep diagram text readable, 'light' must reproduce each
+script's original colors pixel for pixel, and every script takes the same
+rendering options
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from matplotlib.colors import to_rgb
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from diagram_tools import THEMES, add_render_arguments, apply_theme, output_region
+
+# WCAG AA contrast for normal-size text
+MIN_CONTRAST = 4.5
+DPI = 50
+
+
+def luminance(color):
+    channels = [c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+                for c in to_rgb(color)]
+    return 0.2126 * channels[0] + 0.7152 * channels[1] + 0.0722 * channels[2]
+
+
+def contrast(a, b):
+    light, dark = sorted([luminance(a), luminance(b)], reverse=True)
+    return (light + 0.05) / (dark + 0.05)
+
+
+def test_dark_feature_labels_are_readable():
+    theme = THEMES['dark']
+    text = theme['label']['color']
+    for role, props in theme.items():
+        if role.startswith('feature.'):
+            assert contrast(props['facecolor'], text) >= MIN_CONTRAST, role
+
+
+def pixels(fig, region, **kwargs):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='rgba', dpi=DPI, bbox_inches=region, **kwargs)
+    return np.frombuffer(buffer.getvalue(), dtype=np.uint8)
+
+
+def test_light_theme_is_pixel_identical(script_figure, script):
+    fig = script_figure(script)
+    region = output_region(fig, DPI)
+    original = pixels(fig, region)
+    # Styled and saved as render_themes saves the default variant
+    theme = apply_theme(fig, 'light')
+    themed = pixels(fig, region, facecolor=theme['background'], edgecolor='none')
+    assert themed.size == original.size
+    differing = np.count_nonzero((themed != original).reshape(-1, 4).any(axis=1))
+    assert differing == 0, f"{differing} pixels differ"
+
+
+def test_render_arguments():
+    parser = argparse.ArgumentParser()
+    add_render_arguments(parser)
+    args = parser.parse_args([])
+    assert (args.themes, args.dpi, args.low_memory, args.max_rss_mb, args.lint) == (
+        ['light'], 300, False, 256, False)
+    args = parser.parse_args(['--themes', 'all', '--low-memory', '--max-rss-mb', '200'])
+    assert args.themes == list(THEMES) and args.low_memory and args.max_rss_mb == 200
+    with pytest.raises(SystemExit):
+        parser.parse_args(['--themes', 'sepia'])
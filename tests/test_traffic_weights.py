@@ -0,0 +1,132 @@
+"""
+Traffic-log aggregation for the DFD: records stream in from JSONL and CSV
+(gzipped or not), bad records are counted instead of aborting, and the
+totals do not depend on the chunking
+"""
+
+import csv
+import gzip
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(REPO, 'data-flow-diagram'))
+from traffic_weights import (DERIVED_FLOWS, LATENCY_EDGES_MS, TrafficAggregate,
+                             aggregate_logs, match_flow)
+
+RECORDS = [
+    {'method': 'POST', 'path': '/auth/login', 'latency_ms': 12.5},
+    {'method': 'POST', 'path': '/auth/register', 'latency_ms': 40},
+    {'method': 'POST', 'path': '/auth/verify-email', 'duration_ms': 8},
+    {'method': 'POST', 'path': '/bookings', 'latency_ms': 120},
+    {'method': 'POST', 'path': '/bookings/b-17/pay', 'latency_ms': 310},
+    {'method': 'GET', 'path': '/bookings/b-17', 'latency_ms': 22},
+    {'flow': 'Payment\nConfirmation', 'latency_ms': 95},
+    {'method': 'GET', 'path': '/properties/search?city=Lagos'},
+]
+BAD_JSON_LINES = [
+    '{"method": "POST", "path": "/bookin',      # truncated write
+    '[1, 2, 3]',                                # not an object
+    '"stray output"',
+    '{"flow": "Teleport Request"}',             # not a DFD flow
+    '{"method": "GET", "path": "/healthz"}',    # no route
+    '{"method": "POST", "path": "/reviews", "latency_ms": "fast"}',
+]
+
+
+def write_jsonl(path, records, extra_lines=()):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as handle:
+        for record in records:
+            handle.write(json.dumps(record) + '\n')
+        for line in extra_lines:
+            handle.write(line + '\n')
+    return str(path)
+
+
+def counts(totals):
+    return {flow: stats['count'] for flow, stats in totals.summary().items()}
+
+
+def test_gzipped_jsonl_with_bad_lines(tmp_path):
+    path = write_jsonl(tmp_path / 'requests.jsonl.gz', RECORDS, BAD_JSON_LINES)
+    totals = aggregate_logs([path])
+    assert totals.unmatched == len(BAD_JSON_LINES)
+    found = counts(totals)
+    assert found['Login Credentials'] == 2
+    assert found['Verification Status'] == 1
+    assert found['Booking Request'] == 1
+    assert found['Payment Info'] == 1
+    assert found['Booking History'] == 1
+    assert found['Payment Confirmation'] == 1
+    assert found['Property Search Request'] == 1
+    # Untimed requests still count
+    assert totals.summary()['Property Search Request']['p95_ms'] is None
+
+
+def test_csv(tmp_path):
+    path = tmp_path / 'requests.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['method', 'path', 'latency_ms', 'flow'])
+        writer.writerow(['POST', '/messages', '15', ''])
+        writer.writerow(['POST', '/messages/', '', ''])
+        writer.writerow(['GET', '', '5', 'Booking Info'])
+        writer.writerow(['GET', '', '5', 'Not A Flow'])
+        writer.writerow(['DELETE', '/bookings/1', 'n/a', ''])
+    totals = aggregate_logs([str(path)])
+    assert counts(totals) == {'Message': 2, 'Booking Info': 1, 'Notification Data': 2}
+    assert totals.unmatched == 2
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 1000])
+def test_totals_do_not_depend_on_chunk_size(tmp_path, chunk_size):
+    records = RECORDS * 50
+    path = write_jsonl(tmp_path / 'requests.jsonl', records, BAD_JSON_LINES)
+    whole = aggregate_logs([path], chunk_size=10_000)
+    chunked = aggregate_logs([path], chunk_size=chunk_size)
+    np.testing.assert_array_equal(chunked.counts, whole.counts)
+    np.testing.assert_array_equal(chunked.histograms, whole.histograms)
+    assert chunked.unmatched == whole.unmatched
+    assert chunked.summary() == whole.summary()
+
+
+def test_p95_within_one_bin_of_numpy():
+    latencies = np.random.default_rng(4).lognormal(mean=4, sigma=1.2, size=20_000)
+    totals = TrafficAggregate()
+    totals.add_chunk(np.zeros(len(latencies), dtype=np.intp), latencies)
+    exact = np.percentile(latencies, 95)
+    # The estimate is the upper edge of the bin holding the 95th percentile
+    bin_ratio = LATENCY_EDGES_MS[1] / LATENCY_EDGES_MS[0]
+    assert bin_ratio < 1.021
+    assert exact <= totals.percentile(95)[0] <= exact * bin_ratio
+
+
+def test_derived_flows_add_up_their_feeders(tmp_path):
+    path = write_jsonl(tmp_path / 'requests.jsonl', RECORDS)
+    summary = aggregate_logs([path]).summary()
+    for flow, feeders in DERIVED_FLOWS.items():
+        expected = sum(summary.get(feeder, {'count': 0})['count'] for feeder in feeders)
+        assert summary.get(flow, {'count': 0})['count'] == expected, flow
+    assert summary['User Data']['count'] == 3
+    assert summary['Payment Records']['count'] == 2
+
+
+@pytest.mark.parametrize('method, path, flow', [
+    ('POST', '/bookings/b-17/pay', 'Payment Info'),
+    ('POST', '/bookings', 'Booking Request'),
+    ('POST', '/bookings/', 'Booking Request'),
+    ('POST', '/bookings?source=app', 'Booking Request'),
+    ('post', '/bookings/b-17/pay/?retry=1', 'Payment Info'),
+    ('GET', '/bookings/b-17/', 'Booking History'),
+    ('PATCH', '/bookings/b-17/cancel', 'Booking Modifications'),
+    ('GET', '/properties/search', 'Property Search Request'),
+    ('GET', '/properties/p-3', 'Property Details'),
+    ('PUT', '/bookings/b-17/pay', None),
+])
+def test_route_precedence(method, path, flow):
+    assert match_flow(method, path) == flow
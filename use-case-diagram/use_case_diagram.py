@@ -1,8 +1,19 @@
+import argparse
+import os
+import sys
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib.patches import Ellipse, FancyBboxPatch
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from diagram_tools import add_render_arguments, render_themes
+from diagram_tools.lint import lint_figure
+
+parser = argparse.ArgumentParser(description='Generate the use case diagram')
+add_render_arguments(parser)
+args = parser.parse_args()
+
 fig, ax = plt.subplots(figsize=(20, 14))
 ax.set_xlim(0, 20)
 ax.set_ylim(0, 14)
@@ -11,19 +22,20 @@ ax.axis('off')
 # Helper to draw actor as a labeled rounded box
 def draw_actor(x, y, label):
     box = FancyBboxPatch((x-1.4, y-0.6), 2.8, 1.2, boxstyle="round,pad=0.2",
-                         facecolor="#f7f7f7", edgecolor="#333", linewidth=1.5)
+                         facecolor="#f7f7f7", edgecolor="#333", linewidth=1.5, gid='actor')
     ax.add_patch(box)
-    ax.text(x, y, label, ha='center', va='center', fontsize=11, fontweight='bold')
+    ax.text(x, y, label, ha='center', va='center', fontsize=11, fontweight='bold', gid='label')
 
 # Helper to draw use case (ellipse)
 def draw_usecase(x, y, label, w=3.8, h=1.6):
-    e = Ellipse((x, y), width=w, height=h, facecolor="#e8f1ff", edgecolor="#2c5aa0", linewidth=1.8)
+    e = Ellipse((x, y), width=w, height=h, facecolor="#e8f1ff", edgecolor="#2c5aa0", linewidth=1.8,
+                gid='usecase')
     ax.add_patch(e)
-    ax.text(x, y, label, ha='center', va='center', fontsize=10)
+    ax.text(x, y, label, ha='center', va='center', fontsize=10, gid='label')
 
 # Helper to connect actor to use case
 def connect(x1, y1, x2, y2):
-    ax.plot([x1, x2], [y1, y2], color="#666", linewidth=1.4)
+    ax.plot([x1, x2], [y1, y2], color="#666", linewidth=1.4, gid='association')
 
 # Actors
 actors = {
@@ -92,8 +104,12 @@ for (ux, uy) in [(7.5,8.0)]:  # Verify Email
     connect(ex-1.4, ey, ux+2.0, uy)
 
 # Title
-ax.text(10, 13.6, 'Airbnb Clone - Use Case Diagram', ha='center', va='center', fontsize=18, fontweight='bold')
+ax.text(10, 13.6, 'Airbnb Clone - Use Case Diagram', ha='center', va='center', fontsize=18, fontweight='bold', gid='title')
 
 plt.tight_layout()
-fig.savefig('/Users/boitumelomahlaha/Desktop/alx-airbnb-project-documentation/use-case-diagram/use_case_diagram.png', dpi=300, bbox_inches='tight')
-print('Generated use_case_diagram.png')
+if args.lint:
+    sys.exit(1 if lint_figure(fig) else 0)
+for path in render_themes(fig, 'use-case-diagram/use_case_diagram.png', args.themes,
+                          dpi=args.dpi, low_memory=args.low_memory,
+                          max_rss_mb=args.max_rss_mb):
+    print(f'Generated {os.path.basename(path)}')